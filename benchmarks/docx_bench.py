@@ -0,0 +1,224 @@
+"""Temps de génération DOCX par document, avant / après le modèle en mémoire
+
+Corpus : les DOCX existants de n8n_docs_clean/ (relus en blocs), ou avec
+--from-cache les pages du cache HTTP n8n (tableaux compris), et l'export
+weweb_firebase_ready.json pour create_docx. Les implémentations d'origine sont
+reproduites ci-dessous pour servir de référence.
+
+    python benchmarks/docx_bench.py [--limit 200] [--from-cache]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docx import Document  # noqa: E402
+from docx.enum.text import WD_COLOR_INDEX  # noqa: E402
+from docx.oxml.shared import OxmlElement, qn  # noqa: E402
+from docx.shared import Pt  # noqa: E402
+
+from docx_writer import NameRegistry, sanitize_filename  # noqa: E402
+from scrappern8n import build_docx  # noqa: E402
+from scrapperV2 import create_docx  # noqa: E402
+
+
+# Implémentations d'origine (référence)
+def legacy_build_docx(title, blocks):
+    doc = Document()
+    doc.add_heading(title, level=0)
+    for block in blocks:
+        tag, text = block['tag'], block['text']
+        if tag in ["h1", "h2", "h3"]:
+            doc.add_heading(text, level=int(tag[1]))
+        elif tag == "p":
+            doc.add_paragraph(text)
+        elif tag == "li":
+            doc.add_paragraph(f"• {text}")
+        elif tag in ["pre", "code"]:
+            run = doc.add_paragraph().add_run(text)
+            run.font.name = "Courier New"
+            run.font.size = Pt(9)
+        elif tag == "table":
+            table = doc.add_table(rows=1, cols=1)
+            for row_data in block['rows']:
+                if not table.rows:
+                    table.add_row()
+                row_cells = table.rows[-1].cells
+                for i, data in enumerate(row_data):
+                    if i >= len(row_cells):
+                        table.add_column()
+                        row_cells = table.rows[-1].cells
+                    row_cells[i].text = data
+    return doc
+
+
+def legacy_add_hyperlink(paragraph, url, text):
+    r_id = paragraph.part.relate_to(
+        url, "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink", is_external=True)
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), r_id)
+    run = OxmlElement('w:r')
+    rPr = OxmlElement('w:rPr')
+    color = OxmlElement('w:color')
+    color.set(qn('w:val'), '0000EE')
+    rPr.append(color)
+    underline = OxmlElement('w:u')
+    underline.set(qn('w:val'), 'single')
+    rPr.append(underline)
+    run.append(rPr)
+    text_elem = OxmlElement('w:t')
+    text_elem.text = text
+    run.append(text_elem)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def legacy_create_docx(page_data):
+    doc = Document()
+    style = doc.styles['Normal']
+    style.font.name = 'Calibri'
+    style.font.size = Pt(11)
+    doc.add_heading(page_data['title'], 0)
+    meta_table = doc.add_table(rows=2, cols=2)
+    meta_table.style = 'LightShading-Accent1'
+    meta_table.cell(0, 0).text = "URL source"
+    legacy_add_hyperlink(meta_table.cell(0, 1).paragraphs[0], page_data['url'], page_data['url'])
+    meta_table.cell(1, 0).text = "Date de scraping"
+    meta_table.cell(1, 1).text = page_data['metadata']['scraped_at']
+    for section in page_data['sections'].values():
+        doc.add_heading(section['title'], level=2)
+        if section['content']:
+            doc.add_paragraph(section['content'])
+        if section['code_snippets']:
+            doc.add_heading("Code", level=3)
+            for snippet in section['code_snippets']:
+                doc.add_paragraph(f"Langage: {snippet['language']}", style='Intense Quote')
+                run = doc.add_paragraph().add_run(snippet['code'])
+                run.font.name = 'Courier New'
+                run.font.size = Pt(10)
+                run.font.highlight_color = WD_COLOR_INDEX.GRAY_25
+        if section['images']:
+            doc.add_heading("Images", level=3)
+            for img_url in section['images']:
+                legacy_add_hyperlink(doc.add_paragraph(), img_url, img_url)
+    return doc
+
+
+def legacy_reserve(title, output_dir):
+    output_path = os.path.join(output_dir, f"{sanitize_filename(title)}.docx")
+    counter = 1
+    while os.path.exists(output_path):
+        output_path = os.path.join(output_dir, f"{sanitize_filename(title)}_{counter}.docx")
+        counter += 1
+    open(output_path, 'w').close()
+    return output_path
+
+
+# Corpus
+def blocks_from_docx(path):
+    """Relit un DOCX de n8n_docs_clean/ en (titre, blocs)"""
+    doc = Document(path)
+    title, blocks = '', []
+    for paragraph in doc.paragraphs:
+        style, text = paragraph.style.name, paragraph.text
+        if style == 'Title':
+            title = text
+        elif style.startswith('Heading '):
+            blocks.append({'tag': f"h{min(int(style.split()[-1]), 3)}", 'text': text})
+        elif any(run.font.name == 'Courier New' for run in paragraph.runs):
+            blocks.append({'tag': 'pre', 'text': text})
+        elif text.startswith('• '):
+            blocks.append({'tag': 'li', 'text': text[2:]})
+        else:
+            blocks.append({'tag': 'p', 'text': text})
+    return title, blocks
+
+
+def n8n_corpus(limit, from_cache):
+    if from_cache:
+        from http_cache import ResponseCache, cache_path
+        from n8n_blocks import blocks_from_html
+        cache = ResponseCache(cache_path('n8n_docx'))
+        pages = [extracted for _, body in cache.iter_bodies() if (extracted := blocks_from_html(body))]
+        return pages[:limit]
+    return [blocks_from_docx(path) for path in sorted(glob.glob(os.path.join(ROOT, 'n8n_docs_clean', '*.docx')))[:limit]]
+
+
+def measure(render, items):
+    """Durées (ms) de `render(*item)` par document, et nombre d'échecs"""
+    durations, errors = [], 0
+    for item in items:
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                render(*item)
+        except Exception:
+            errors += 1
+            continue
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations, errors
+
+
+def report(name, before, after):
+    (before_ms, before_errors), (after_ms, after_errors) = before, after
+    print(f"\n📊 {name}")
+    for label, durations, errors in (("avant", before_ms, before_errors), ("après", after_ms, after_errors)):
+        durations = sorted(durations) or [0]
+        p95 = durations[int(len(durations) * 0.95) - 1] if len(durations) > 1 else durations[0]
+        print(f"   {label:6} moyenne {statistics.mean(durations):7.2f} ms  médiane {statistics.median(durations):7.2f} ms"
+              f"  p95 {p95:7.2f} ms  ({len(durations)} docs, {errors} échec(s))")
+    if before_ms and after_ms:
+        print(f"   ⚡ x{statistics.mean(before_ms) / statistics.mean(after_ms):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la génération DOCX")
+    parser.add_argument('--limit', type=int, default=200, help="Nombre de documents par corpus")
+    parser.add_argument('--from-cache', action='store_true', help="Corpus n8n lu dans le cache HTTP")
+    args = parser.parse_args()
+
+    pages = n8n_corpus(args.limit, args.from_cache)
+    if not pages:
+        parser.error("corpus n8n vide (n8n_docs_clean/ ou cache HTTP n8n_docx)")
+    build_docx(*pages[0])  # Le modèle est préparé une fois, hors mesure
+    report(f"n8n build_docx ({len(pages)} pages)",
+           measure(lambda title, blocks: legacy_build_docx(title, blocks).save(io.BytesIO()), pages),
+           measure(lambda title, blocks: build_docx(title, blocks).save(io.BytesIO()), pages))
+
+    with open(os.path.join(ROOT, 'weweb_firebase_ready.json'), 'r', encoding='utf-8') as f:
+        weweb = [(page_data,) for page_data in json.load(f)['pages'].values()][:args.limit]
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'page.docx')
+        report(f"WeWeb create_docx ({len(weweb)} pages, écriture disque comprise)",
+               measure(lambda page_data: legacy_create_docx(page_data).save(output_path), weweb),
+               measure(lambda page_data: create_docx(page_data, output_path), weweb))
+
+    # Noms de fichiers : 1000 pages sur 20 titres, les doublons allongent la recherche d'un nom libre.
+    # Des deux côtés, chaque nom attribué est créé sur disque comme le ferait le DOCX écrit.
+    titles = [f"Page {i % 20}" for i in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for title in titles:
+            legacy_reserve(title, tmp)
+        legacy_ms = (time.perf_counter() - start) * 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        registry = NameRegistry(tmp)
+        for title in titles:
+            open(registry.reserve(sanitize_filename(title)), 'w').close()
+        registry_ms = (time.perf_counter() - start) * 1000
+    print(f"\n📊 Attribution de {len(titles)} noms (20 titres distincts)")
+    print(f"   avant {legacy_ms:.1f} ms, après {registry_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
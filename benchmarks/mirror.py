@@ -0,0 +1,240 @@
+"""Miroir local figé des sites de documentation, pour des benchmarks reproductibles
+
+Trois sites sont servis par un même serveur HTTP :
+    /dev/   pages developer.weweb.io de weweb_docs.json
+    /docs/  pages docs.weweb.io de weweb_docs.json
+    /n8n/   pages de n8n_docs_simple/documentation.json (gabarit MkDocs Material)
+
+Avec --pages N, chaque site WeWeb est complété par des pages synthétiques
+dérivées des vraies jusqu'à N/2 pages, et n8n jusqu'à N pages. Les pages sont
+générées à la demande (rien n'est écrit sur disque) et chaînées en arbre pour
+que l'exploration en largeur les trouve toutes ; chaque site a aussi son
+sitemap, ses ETag et un Last-Modified fixes (réponses 304).
+
+    python benchmarks/mirror.py --pages 10000 --port 8800
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration
+MIRROR_PORT = 8800
+MIRROR_HOST = "127.0.0.1"  # Miroir de test : local par défaut
+FANOUT = 20  # Liens vers des pages filles par page
+SITEMAP_SIZE = 50000  # URLs maximum par fichier sitemap
+SNAPSHOT_DATE = "2024-01-01"
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+SEED_HOSTS = {'dev': 'developer.weweb.io', 'docs': 'docs.weweb.io'}
+
+
+def load_seeds():
+    """Pages réelles de chaque site : {site: [page]} (chemins dédupliqués, racine en tête)"""
+    with open(os.path.join(ROOT, 'weweb_docs.json'), 'r', encoding='utf-8') as f:
+        weweb = json.load(f)
+    with open(os.path.join(ROOT, 'n8n_docs_simple', 'documentation.json'), 'r', encoding='utf-8') as f:
+        n8n = json.load(f)
+
+    seeds = {site: [] for site in ('dev', 'docs', 'n8n')}
+    for page in weweb:
+        parts = urlsplit(page['url'])
+        for site, host in SEED_HOSTS.items():
+            if parts.netloc == host:
+                seeds[site].append({'path': parts.path.strip('/'), 'title': page['page_title'],
+                                    'sections': list(page['sections'].values())})
+    for page in n8n:
+        seeds['n8n'].append({'path': urlsplit(page['url']).path.strip('/'), 'title': page['h1'].rstrip('#'),
+                             'sections': [{'title': page['h1'].rstrip('#'), 'content': page['content']}]})
+
+    for site, pages in seeds.items():
+        unique = {}
+        for page in pages:
+            unique.setdefault(page['path'], page)
+        root = unique.pop('', None) or {'path': '', 'title': f"{site} home", 'sections': []}
+        seeds[site] = [root] + sorted(unique.values(), key=lambda page: page['path'])
+    return seeds
+
+
+class Site:
+    """Pages d'un site du miroir : les réelles, puis les synthétiques jusqu'à `size`"""
+
+    def __init__(self, name, seeds, size=0):
+        self.name = name
+        self.seeds = seeds
+        self.size = max(size, len(seeds))
+        self.index = {page['path']: number for number, page in enumerate(seeds)}
+
+    def path(self, number):
+        return self.seeds[number]['path'] if number < len(self.seeds) else f"synthetic/{number}"
+
+    def number(self, path):
+        """Numéro de la page servie à `path` (relatif au site), ou None"""
+        path = path.strip('/')
+        if path.startswith('synthetic/'):
+            number = path[len('synthetic/'):]
+            return int(number) if number.isdigit() and len(self.seeds) <= int(number) < self.size else None
+        return self.index.get(path)
+
+    def page(self, number):
+        if number < len(self.seeds):
+            return self.seeds[number]
+        # Page synthétique : contenu d'une page réelle, titre et dernier paragraphe propres à la page
+        seed = self.seeds[1 + number % (len(self.seeds) - 1)] if len(self.seeds) > 1 else self.seeds[0]
+        sections = [dict(section) for section in seed['sections']] or [{'title': seed['title'], 'content': ''}]
+        sections[-1]['content'] = f"{sections[-1].get('content', '')}\nSynthetic page {number} of {self.name}."
+        return {'path': self.path(number), 'title': f"{seed['title']} ({number})", 'sections': sections}
+
+    def links(self, number):
+        """Accueil + pages filles (arbre de degré FANOUT) ; l'accueil n8n liste tout son menu"""
+        if self.name == 'n8n' and number == 0:
+            children = range(1, self.size)
+        else:
+            children = range(number * FANOUT + 1, min((number + 1) * FANOUT + 1, self.size))
+        return [''] + [self.path(child) for child in children]
+
+    def render(self, number):
+        page = self.page(number)
+        prefix = f"/{self.name}/"
+        nav = ''.join(f'<a href="{prefix}{html.escape(link)}">{html.escape(link or "Home")}</a>'
+                      for link in self.links(number))
+        body = []
+        for i, section in enumerate(page['sections']):
+            body.append(f'<h2 id="section-{i}">{html.escape(section.get("title", ""))}</h2>')
+            body += [f"<p>{html.escape(line)}</p>" for line in section.get('content', '').split('\n') if line]
+            for snippet in section.get('code_snippets', []):
+                body.append(f'<pre><code class="language-{html.escape(snippet.get("language", ""))}">'
+                            f'{html.escape(snippet.get("code", ""))}</code></pre>')
+            body += [f'<img src="{html.escape(image)}">' for image in section.get('images', [])]
+        title = html.escape(page['title'])
+
+        if self.name == 'n8n':
+            return (f"<html><head><title>{title} | n8n Docs</title></head><body><nav>{nav}</nav>"
+                    f'<main><div class="md-content__inner"><h1>{title}</h1>{"".join(body)}</div></main>'
+                    f"</body></html>")
+        return (f"<html><head><title>{title}</title></head><body><nav>{nav}</nav>"
+                f"<main><h1>{title}</h1>{''.join(body)}</main></body></html>")
+
+    def sitemap(self, host, part=None):
+        """Sitemap du site ; un index de sitemaps au-delà de SITEMAP_SIZE URLs"""
+        base = f"http://{host}/{self.name}/"
+        parts = (self.size + SITEMAP_SIZE - 1) // SITEMAP_SIZE
+        if part is None and parts > 1:
+            entries = ''.join(f"<sitemap><loc>{base}sitemap-{n}.xml</loc></sitemap>" for n in range(parts))
+            return f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+        start = (part or 0) * SITEMAP_SIZE
+        entries = ''.join(f"<url><loc>{base}{html.escape(self.path(n))}</loc><lastmod>{SNAPSHOT_DATE}</lastmod></url>"
+                          for n in range(start, min(start + SITEMAP_SIZE, self.size)))
+        return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+def make_sites(pages=0):
+    seeds = load_seeds()
+    return {
+        'dev': Site('dev', seeds['dev'], pages // 2),
+        'docs': Site('docs', seeds['docs'], pages // 2),
+        'n8n': Site('n8n', seeds['n8n'], pages)
+    }
+
+
+def serve(pages=0, port=MIRROR_PORT, latency=0.0, error_rate=0.0, compress=False, host=MIRROR_HOST):
+    """Sert le miroir ; `error_rate` : part des pages répondues 429 (Retry-After: 1) ou 503
+
+    Avec `compress`, les pages sont compressées (br ou gzip) selon l'Accept-Encoding du client.
+    """
+    sites = make_sites(pages)
+
+    class MirrorHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Connexions persistantes, comme un vrai CDN
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            path = urlsplit(self.path).path
+            if path == '/robots.txt':
+                return self.reply(200, "User-agent: *\nAllow: /\n", 'text/plain')
+
+            site_name, _, rest = path.strip('/').partition('/')
+            site = sites.get(site_name)
+            if site is None:
+                return self.reply(404, "Not found", 'text/plain')
+            if rest == 'sitemap.xml' or (rest.startswith('sitemap-') and rest.endswith('.xml')):
+                part = None if rest == 'sitemap.xml' else int(rest[len('sitemap-'):-len('.xml')])
+                return self.reply(200, site.sitemap(self.headers.get('Host', f"localhost:{port}"), part),
+                                  'application/xml')
+
+            number = site.number(rest)
+            if number is None:
+                return self.reply(404, "Not found", 'text/plain')
+            if error_rate and random.random() < error_rate:
+                if random.random() < 0.5:
+                    return self.reply(429, "Too Many Requests", 'text/plain', retry_after=1)
+                return self.reply(503, "Service Unavailable", 'text/plain')
+            etag = f'"{site_name}-{number}-{hashlib.md5(site.path(number).encode()).hexdigest()[:8]}"'
+            if self.headers.get('If-None-Match') == etag:
+                return self.reply(304, '', etag=etag)
+            self.reply(200, site.render(number), 'text/html; charset=utf-8', etag=etag)
+
+        def reply(self, status, text, content_type=None, etag=None, retry_after=None):
+            body = text.encode('utf-8')
+            encoding = None
+            if compress and status == 200:
+                accepted = self.headers.get('Accept-Encoding', '')
+                if brotli and 'br' in accepted:
+                    body, encoding = brotli.compress(body, quality=4), 'br'
+                elif 'gzip' in accepted:
+                    body, encoding = gzip.compress(body, compresslevel=5), 'gzip'
+            self.send_response(status)
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if content_type:
+                self.send_header('Content-Type', content_type)
+            if retry_after:
+                self.send_header('Retry-After', str(retry_after))
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', LAST_MODIFIED)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MirrorHandler)
+    server.daemon_threads = True
+    sizes = ', '.join(f"{name} {site.size}" for name, site in sites.items())
+    print(f"🪞 Miroir sur http://localhost:{port} ({sizes} pages)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Miroir local des sites de documentation")
+    parser.add_argument('--pages', type=int, default=0, help="Taille visée (pages synthétiques ajoutées)")
+    parser.add_argument('--port', type=int, default=MIRROR_PORT)
+    parser.add_argument('--host', default=MIRROR_HOST, help="Adresse d'écoute (0.0.0.0 : accessible depuis le réseau)")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Latence ajoutée à chaque réponse")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Part des pages en 429 / 503 (saturation simulée)")
+    parser.add_argument('--compress', action='store_true', help="Réponses compressées (br / gzip) comme un CDN")
+    args = parser.parse_args()
+    serve(args.pages, args.port, args.latency_ms / 1000, args.error_rate, args.compress, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Benchmark des scrapers contre le miroir local (benchmarks/mirror.py)
+
+Chaque étape tourne dans son propre processus (pic de mémoire mesuré à part) :
+    discovery      exploration des deux sites WeWeb (liens seulement)
+    n8n_discovery  menu + sitemap n8n (scrappern8n.discover_links)
+    scrape         exploration + scrape_page de scrapperV2, pages écrites en JSON (état de reprise SQLite)
+    docx           create_docx sur les --docx-pages premières pages, en pool de processus
+    convert        convertScript.py sur le JSON produit par `scrape`
+
+(`docx` et `convert` lisent la sortie de `scrape`.)
+
+Le débit (pages/s) et le pic de RSS sont comparés à benchmarks/baseline.json :
+le script échoue si une étape régresse au-delà de --tolerance.
+
+    python benchmarks/run_bench.py [--pages 10000] [--save-baseline]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+# Configuration
+STAGES = ('discovery', 'n8n_discovery', 'scrape', 'docx', 'convert')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+TOLERANCE = 0.25  # Écart admis avec la référence (débit plus bas ou mémoire plus haute)
+DOCX_PAGES = 200
+CRAWL_DELAY = 0.001  # Le miroir est local : le limiteur de débit ne doit pas être le goulot
+HEADERS = {'User-Agent': 'weweb-docs-benchmark'}
+
+
+def site_urls(port):
+    """Deux hôtes distincts pour les deux sites WeWeb, comme en production"""
+    return f"http://localhost:{port}/dev", f"http://127.0.0.1:{port}/docs", f"http://localhost:{port}/n8n"
+
+
+def peak_rss_mb():
+    """Pic de RSS du processus et de ses enfants (pool de rendu), en Mo"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+
+# Étapes (exécutées dans un processus enfant, dossier de travail partagé)
+def stage_discovery(port, args):
+    from crawler import get_all_urls
+    dev, docs, _ = site_urls(port)
+    return {'pages': sum(len(urls) for urls in get_all_urls(dev, docs, headers=HEADERS, delay=CRAWL_DELAY))}
+
+
+def stage_n8n_discovery(port, args):
+    import scrappern8n
+    from transport import make_client
+    scrappern8n.BASE_URL = site_urls(port)[2]
+
+    async def discover():
+        async with make_client(timeout=60) as client:
+            return await scrappern8n.discover_links(client, None)
+
+    links, _ = asyncio.run(discover())
+    return {'pages': len(links)}
+
+
+def stage_scrape(port, args):
+    from crawl_state import CrawlState
+    from crawler import run_pipeline
+    from json_stream import StreamingJsonWriter
+    from metrics import Metrics
+    from scrapperV2 import extract_page
+    dev, docs, _ = site_urls(port)
+    metrics = Metrics('benchmark')
+    writer = StreamingJsonWriter('pages.json', layout='array')
+    state = CrawlState('crawl_state.sqlite', on_checkpoint=writer.checkpoint)
+    run_pipeline(dev, docs, headers=HEADERS, delay=CRAWL_DELAY, extract=extract_page, write=writer.write,
+                 metrics=metrics, state=state)
+    writer.close()
+    extract = metrics.stage_summaries().get('extract', {})
+    return {'pages': writer.count, 'scrape_page_mean_ms': extract.get('mean_ms')}
+
+
+def stage_docx(port, args):
+    from convertScript import read_export
+    from docx_render import RenderPool
+    from docx_writer import NameRegistry, sanitize_filename
+    from scrapperV2 import create_docx
+    os.makedirs('docx', exist_ok=True)
+    pool = RenderPool(args.render_workers)
+    registry = NameRegistry('docx')
+    count = 0
+    for _, page_data in read_export('pages.json')[1]:
+        if count >= args.docx_pages:
+            break
+        pool.submit_wait(create_docx, page_data, registry.reserve(sanitize_filename(page_data['title'])),
+                         label=page_data['url'])
+        count += 1
+    failed = pool.close()
+    return {'pages': count - len(failed)}
+
+
+def stage_convert(port, args):
+    import convertScript
+    sys.argv = ['convertScript.py', 'pages.json', '--format', 'csv']
+    convertScript.main()
+    with open('pages.csv', 'r', encoding='utf-8') as f:
+        return {'pages': sum(1 for _ in f) - 1}
+
+
+def run_stage(stage, port, args):
+    """Exécute une étape et affiche son résultat en JSON sur la dernière ligne"""
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        start = time.perf_counter()
+        result = globals()[f"stage_{stage}"](port, args)
+        seconds = time.perf_counter() - start
+    result.update(seconds=round(seconds, 3), pages_per_second=round(result['pages'] / seconds, 2),
+                  peak_rss_mb=peak_rss_mb())
+    print(json.dumps(result))
+
+
+# Orchestration
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mirror(pages, port):
+    mirror = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'mirror.py'), '--pages', str(pages),
+                               '--port', str(port)], stdout=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return mirror
+        except OSError:
+            time.sleep(0.2)
+    mirror.kill()
+    raise RuntimeError("le miroir n'a pas démarré")
+
+
+def compare(results, baseline, tolerance):
+    """Liste des régressions par rapport à la référence"""
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        if result['pages_per_second'] < reference['pages_per_second'] * (1 - tolerance):
+            regressions.append(f"{stage}: {result['pages_per_second']} pages/s "
+                               f"(référence {reference['pages_per_second']})")
+        if result['peak_rss_mb'] > reference['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{stage}: pic RSS {result['peak_rss_mb']} Mo (référence {reference['peak_rss_mb']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des scrapers contre un miroir local")
+    parser.add_argument('--pages', type=int, default=0, help="Taille du miroir (0 : pages réelles seulement)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--docx-pages', type=int, default=DOCX_PAGES)
+    parser.add_argument('--render-workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="Enregistre les résultats comme référence")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--stage', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        return run_stage(args.stage, args.port, args)
+
+    port = free_port()
+    mirror = start_mirror(args.pages, port)
+    workdir = tempfile.mkdtemp(prefix='scraper-bench-')
+    results = {}
+    try:
+        for stage in args.stages:
+            command = [sys.executable, os.path.abspath(__file__), '--stage', stage, '--port', str(port),
+                       '--docx-pages', str(args.docx_pages), '--render-workers', str(args.render_workers)]
+            output = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+            if output.returncode:
+                print(output.stderr)
+                sys.exit(f"❌ Étape {stage} en échec")
+            # Dernière ligne JSON : les processus de rendu peuvent aussi écrire sur la sortie
+            results[stage] = json.loads([line for line in output.stdout.splitlines() if line.startswith('{')][-1])
+            result = results[stage]
+            print(f"⏱️ {stage:14} {result['pages']:>7} pages  {result['seconds']:8.2f} s  "
+                  f"{result['pages_per_second']:9.2f} pages/s  pic RSS {result['peak_rss_mb']:7.1f} Mo")
+    finally:
+        mirror.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+    key = str(args.pages)
+
+    if args.save_baseline:
+        baselines[key] = {**baselines.get(key, {}), **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"💾 Référence enregistrée pour {key} pages : {args.baseline}")
+        return
+
+    if key not in baselines:
+        print(f"ℹ️ Aucune référence pour {key} pages (--save-baseline pour en créer une)")
+        return
+    regressions = compare(results, baselines[key], args.tolerance)
+    for regression in regressions:
+        print(f"📉 {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"✅ Aucune régression au-delà de {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
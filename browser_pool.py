@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+
+from politeness import backoff_delay
+
+# Configuration
+POOL_SIZE = 4  # Nombre d'onglets Chromium travaillant en parallèle
+PAGE_TIMEOUT = 30000  # Délai maximal par page (ms)
+MAX_RETRIES = 2
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'plausible.io',
+    'segment.com', 'segment.io', 'hotjar.com', 'posthog.com', 'sentry.io'
+)
+
+
+async def block_heavy_resources(route):
+    """Interception réseau : bloque images, polices, médias et traceurs"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def new_light_page(browser, timeout=PAGE_TIMEOUT):
+    """Ouvre un onglet dans un contexte isolé, sans ressources inutiles au texte"""
+    context = await browser.new_context()
+    context.set_default_timeout(timeout)
+    await context.route("**/*", block_heavy_resources)
+    return await context.new_page()
+
+
+async def close_page(page):
+    """Ferme le contexte d'un onglet (éventuellement déjà hors d'usage) sans propager d'erreur"""
+    if page is not None:
+        with contextlib.suppress(Exception):
+            await page.context.close()
+
+
+async def run_page_pool(browser, links, handler, pool_size=POOL_SIZE, timeout=PAGE_TIMEOUT, retries=MAX_RETRIES):
+    """Traite `links` avec un pool d'onglets : `await handler(page, link)` pour chaque lien
+
+    Chaque onglet dépile la file asyncio, chaque page dispose de `timeout` ms et
+    d'au plus `retries` nouvelles tentatives (dans un onglet neuf, après une
+    attente exponentielle avec gigue) avant d'être déclarée en erreur ; un
+    onglet impossible à ouvrir compte comme un essai échoué de la page en cours.
+    Retourne la liste des liens en échec.
+    """
+    queue = asyncio.Queue()
+    for link in links:
+        queue.put_nowait(link)
+    failed = []
+
+    async def worker():
+        page = None
+        try:
+            while not queue.empty():
+                link = queue.get_nowait()
+                for attempt in range(retries + 1):
+                    try:
+                        if page is None:
+                            page = await new_light_page(browser, timeout)
+                        await asyncio.wait_for(handler(page, link), timeout / 1000 * 2)
+                        break
+                    except Exception as e:
+                        # L'essai suivant (ou le lien suivant) repart d'un onglet neuf
+                        await close_page(page)
+                        page = None
+                        if attempt == retries:
+                            print(f"❌ Erreur sur {link}: {str(e)}")
+                            failed.append(link)
+                        else:
+                            print(f"🔁 Nouvel essai ({attempt + 1}/{retries}) pour {link}: {str(e)}")
+                            await asyncio.sleep(backoff_delay(attempt + 1))
+        finally:
+            await close_page(page)
+
+    await asyncio.gather(*[worker() for _ in range(min(pool_size, len(links)) or 1)])
+    return failed
@@ -0,0 +1,168 @@
+import argparse
+import json
+import re
+import uuid
+
+from convertScript import normalize_page, page_id_for, read_export
+from manifest import content_hash
+
+# tiktoken donne le compte exact de tokens ; sans lui, le compte est estimé par mots et ponctuation
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding('cl100k_base')
+except ImportError:
+    ENCODING = None
+
+# Configuration
+TOKEN_BUDGET = 400  # Tokens maximum par morceau
+OVERLAP_TOKENS = 50  # Tokens repris du morceau précédent d'une même section
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def count_tokens(text):
+    if ENCODING is not None:
+        return len(ENCODING.encode(text))
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def chunk_id_for(page_key, section_key, kind, order):
+    """Identifiant stable d'un morceau, dans la continuité des uuid5 de convertScript.py"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{page_key}_{section_key}_{kind}_{order}"))
+
+
+def split_units(text):
+    """Paragraphes, puis phrases pour le texte déjà aplati en une seule ligne"""
+    units = []
+    for paragraph in text.split('\n'):
+        paragraph = paragraph.strip()
+        if paragraph:
+            units.extend(part for part in re.split(r'(?<=[.!?:#])\s+', paragraph) if part)
+    return units
+
+
+def split_oversized(unit, budget):
+    """Coupe un paragraphe plus long que le budget sur les espaces"""
+    words = unit.split()
+    piece = []
+    for word in words:
+        piece.append(word)
+        if count_tokens(' '.join(piece)) >= budget:
+            yield ' '.join(piece)
+            piece = []
+    if piece:
+        yield ' '.join(piece)
+
+
+def tail_tokens(text, size):
+    """Les derniers mots du texte représentant environ `size` tokens (chevauchement)"""
+    words = text.split()
+    tail = []
+    while words and count_tokens(' '.join(tail)) < size:
+        tail.insert(0, words.pop())
+    return ' '.join(tail)
+
+
+def pack_text(text, budget=TOKEN_BUDGET, overlap=OVERLAP_TOKENS):
+    """Regroupe paragraphes et phrases en morceaux d'au plus `budget` tokens
+
+    Chaque morceau après le premier commence par les `overlap` derniers tokens
+    du précédent, pour ne pas perdre le contexte à la coupure.
+    """
+    chunks = []
+    current, size = [], 0
+    for unit in split_units(text):
+        unit_size = count_tokens(unit)
+        pieces = [unit] if unit_size <= budget else list(split_oversized(unit, budget - overlap))
+        for piece in pieces:
+            piece_size = count_tokens(piece) if len(pieces) > 1 else unit_size
+            if current and size + piece_size > budget:
+                chunks.append(' '.join(current))
+                prefix = tail_tokens(chunks[-1], overlap) if overlap else ''
+                prefix_size = count_tokens(prefix) if prefix else 0
+                if prefix_size + piece_size > budget:
+                    prefix, prefix_size = '', 0
+                current = [prefix] if prefix else []
+                size = prefix_size
+            current.append(piece)
+            size += piece_size
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def pack_code(code, budget=TOKEN_BUDGET):
+    """Un extrait de code reste entier s'il tient dans le budget, sinon il est coupé entre deux lignes"""
+    if count_tokens(code) <= budget:
+        return [code]
+    chunks, current = [], []
+    for line in code.split('\n'):
+        if current and count_tokens('\n'.join(current + [line])) > budget:
+            chunks.append('\n'.join(current))
+            current = []
+        current.append(line)
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def chunk_page(page_key, page_data, budget=TOKEN_BUDGET, overlap=OVERLAP_TOKENS):
+    """Morceaux d'une page, section par section : texte découpé au budget, code intact
+
+    Retourne des dicts {id, page_id, url, section, title, kind ('text' | 'code'),
+    language, text, tokens, hash}. L'identifiant ne dépend que de la page, de la
+    section et du rang du morceau : comparé à `hash`, il permet de ne
+    ré-encoder que les morceaux modifiés.
+    """
+    page = normalize_page(page_data)
+    page_title = page.get('title', '')
+    for section_key, section in page.get('sections', {}).items():
+        title = section.get('title', '') or page_title
+        pieces = [('text', None, text) for text in pack_text(section.get('content', ''), budget, overlap)]
+        for snippet in section.get('code_snippets', []):
+            pieces += [('code', snippet.get('language', 'unknown'), code)
+                       for code in pack_code(snippet.get('code', ''), budget) if code.strip()]
+
+        orders = {'text': 0, 'code': 0}
+        for kind, language, text in pieces:
+            orders[kind] += 1
+            yield {
+                'id': chunk_id_for(page_key, section_key, kind, orders[kind]),
+                'page_id': page_id_for(page_key),
+                'url': page.get('url', ''),
+                'section': section_key,
+                'title': title,
+                'kind': kind,
+                'language': language,
+                'text': text,
+                'tokens': count_tokens(text),
+                'hash': content_hash({'title': title, 'text': text})
+            }
+
+
+def iter_chunks(paths, budget=TOKEN_BUDGET, overlap=OVERLAP_TOKENS):
+    """Morceaux de toutes les pages des exports donnés (lus au fil de l'eau)"""
+    for path in paths:
+        _, pages = read_export(path)
+        for page_key, page_data in pages:
+            yield from chunk_page(page_key, page_data, budget, overlap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Découpage des pages scrapées en morceaux pour l'embedding")
+    parser.add_argument('inputs', nargs='+')
+    parser.add_argument('-o', '--output', default='chunks.jsonl')
+    parser.add_argument('--budget', type=int, default=TOKEN_BUDGET)
+    parser.add_argument('--overlap', type=int, default=OVERLAP_TOKENS)
+    args = parser.parse_args()
+
+    count = tokens = 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for chunk in iter_chunks(args.inputs, args.budget, args.overlap):
+            f.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+            count += 1
+            tokens += chunk['tokens']
+    print(f"✂️ {count} morceaux ({tokens / max(count, 1):.0f} tokens en moyenne) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
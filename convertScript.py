@@ -1,91 +1,272 @@
-import json
+import argparse
 import csv
+import json
+import os
+import re
+import sys
+import time
 import uuid
 
-# Charger le JSON
-with open('weweb_firebase_ready.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+from json_stream import read_jsonl
+from manifest import Manifest, content_hash
+from parquet_export import ParquetTables
+
+# ijson lit l'export au fil de l'eau ; sans lui, le fichier est chargé en entier
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+INPUT_FILE = 'weweb_firebase_ready.json'
+MANIFEST_FILE = 'csv_manifest.json'
+FIELDNAMES = {
+    'pages': ['id', 'url', 'title', 'created_at', 'scraped_at', 'source_url'],
+    'sections': ['id', 'page_id', 'section_id', 'title', 'content', 'order'],
+    'code_snippets': ['id', 'section_id', 'code', 'language', 'order'],
+    'images': ['id', 'section_id', 'url', 'alt_text', 'order'],
+    'tips': ['id', 'section_id', 'content', 'order']
+}
 
 # Fonction pour nettoyer le texte
 def clean_text(text):
     return text.replace('\n', ' ').replace('\r', ' ').strip() if text else ''
 
-# Générer les CSV
-with open('pages.csv', 'w', newline='', encoding='utf-8') as pages_file, \
-     open('sections.csv', 'w', newline='', encoding='utf-8') as sections_file, \
-     open('code_snippets.csv', 'w', newline='', encoding='utf-8') as code_snippets_file, \
-     open('images.csv', 'w', newline='', encoding='utf-8') as images_file, \
-     open('tips.csv', 'w', newline='', encoding='utf-8') as tips_file:
-
-    # Configurer les writers CSV
-    writers = {
-        'pages': csv.DictWriter(pages_file, fieldnames=['id', 'url', 'title', 'created_at', 'scraped_at', 'source_url']),
-        'sections': csv.DictWriter(sections_file, fieldnames=['id', 'page_id', 'section_id', 'title', 'content', 'order']),
-        'code_snippets': csv.DictWriter(code_snippets_file, fieldnames=['id', 'section_id', 'code', 'language', 'order']),
-        'images': csv.DictWriter(images_file, fieldnames=['id', 'section_id', 'url', 'alt_text', 'order']),
-        'tips': csv.DictWriter(tips_file, fieldnames=['id', 'section_id', 'content', 'order'])
+def csv_path(table):
+    return f"{table}.csv"
+
+def page_id_for(page_key):
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, page_key))
+
+def page_key_for(url):
+    """Clé d'une page hors export Firebase : la même que celle calculée par scrapper.py"""
+    return re.sub(r'[\.\$#\[\]\/]', '_', str(url)).strip()[:768]
+
+def normalize_page(page_data):
+    """Ramène une page au schéma Firebase WeWeb (url, title, sections, metadata)
+
+    Accepte aussi les exports à plat {h1, url, content} (n8n, documentation.json)
+    et les pages de weweb_docs.json (page_title), dont le contenu devient une
+    section unique.
+    """
+    if 'sections' in page_data:
+        if 'title' not in page_data and 'page_title' in page_data:
+            page_data = dict(page_data, title=page_data['page_title'])
+        return page_data
+
+    title = page_data.get('h1') or page_data.get('title', '')
+    return {
+        'url': page_data.get('url', ''),
+        'title': title,
+        'sections': {'content': {'title': title, 'content': page_data.get('content', '')}},
+        'metadata': page_data.get('metadata', {})
     }
 
-    # Écrire les en-têtes
-    for writer in writers.values():
-        writer.writeheader()
-
-    # Traiter chaque page
-    for page_key, page_data in data['pages'].items():
-        page_id = str(uuid.uuid5(uuid.NAMESPACE_URL, page_key))
-        
-        # Écrire la page
-        writers['pages'].writerow({
-            'id': page_id,
-            'url': page_data.get('url', ''),
-            'title': clean_text(page_data.get('title', '')),
-            'created_at': data['metadata'].get('created_at', ''),
-            'scraped_at': page_data['metadata'].get('scraped_at', ''),
-            'source_url': page_data['metadata'].get('source_url', '')
-        })
-
-        # Traiter les sections
-        if 'sections' in page_data:
-            for section_order, (section_key, section_data) in enumerate(page_data['sections'].items(), 1):
-                section_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{page_key}_{section_key}"))
-                
-                writers['sections'].writerow({
-                    'id': section_id,
-                    'page_id': page_id,
-                    'section_id': section_key,
-                    'title': clean_text(section_data.get('title', '')),
-                    'content': clean_text(section_data.get('content', '')),
-                    'order': section_order
-                })
-
-                # Écrire les code snippets
-                for cs_order, cs in enumerate(section_data.get('code_snippets', []), 1):
-                    writers['code_snippets'].writerow({
-                        'id': str(uuid.uuid4()),
-                        'section_id': section_id,
-                        'code': clean_text(cs.get('code', '')),
-                        'language': clean_text(cs.get('language', 'unknown')),
-                        'order': cs_order
-                    })
-
-                # Écrire les images
-                for img_order, img in enumerate(section_data.get('images', []), 1):
-                    writers['images'].writerow({
-                        'id': str(uuid.uuid4()),
-                        'section_id': section_id,
-                        'url': img if isinstance(img, str) else img.get('url', ''),
-                        'alt_text': '' if isinstance(img, str) else img.get('alt_text', ''),
-                        'order': img_order
-                    })
-
-                # Écrire les tips
-for tip_order, tip in enumerate(section_data.get('tips', []), 1):
-    if tip:  # Ne traiter que si le tip n'est pas vide
-        writers['tips'].writerow({
-            'id': str(uuid.uuid4()),
-            'section_id': section_id,
-            'content': clean_text(tip),
-            'order': tip_order
-        })
-
-print("Conversion terminée ! Fichiers CSV générés : pages.csv, sections.csv, code_snippets.csv, images.csv, tips.csv")
\ No newline at end of file
+def first_char(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        while (char := f.read(1)) and char.isspace():
+            pass
+    return char
+
+def read_export(path):
+    """Ouvre un export et retourne (created_at, itérateur de (clé, page))
+
+    Formats acceptés : objet Firebase {metadata, pages}, tableau JSON de pages,
+    journal JSON Lines (.jsonl) et CSV Notion (Title, URL, Content). Avec ijson, le JSON est lu par événements
+    et une seule page est en mémoire à la fois.
+    """
+    if path.endswith('.jsonl'):
+        return '', ((page_key_for(page['url']), page) for page in read_jsonl(path))
+    if path.endswith('.csv'):
+        return '', ((page_key_for(page['url']), page) for page in iter_notion_csv(path))
+
+    if ijson is None:
+        print("ijson n'est pas installé : l'export est chargé entièrement en mémoire")
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return '', ((page_key_for(page['url']), page) for page in data)
+        return data.get('metadata', {}).get('created_at', ''), iter(data['pages'].items())
+
+    if first_char(path) == '[':
+        return '', ((page_key_for(page['url']), page) for page in iter_json(path, 'item'))
+
+    # Les métadonnées précèdent les pages : la première lecture s'arrête tôt
+    with open(path, 'rb') as f:
+        metadata = next(ijson.items(f, 'metadata'), {})
+    return metadata.get('created_at', ''), iter_json(path, 'pages', kv=True)
+
+def iter_notion_csv(path):
+    """Pages d'un export CSV Notion, au format à plat {h1, url, content}"""
+    csv.field_size_limit(sys.maxsize)  # Certaines pages dépassent la limite de 128 Ko par champ
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield {'h1': row['Title'], 'url': row['URL'], 'content': row['Content']}
+
+def iter_json(path, prefix, kv=False):
+    with open(path, 'rb') as f:
+        yield from (ijson.kvitems if kv else ijson.items)(f, prefix, use_float=True)
+
+def page_rows(page_key, page_data, created_at):
+    """Génère les lignes (table, ligne) d'une page et de ses sections"""
+    page_id = page_id_for(page_key)
+    page_data = normalize_page(page_data)
+
+    # Écrire la page
+    yield 'pages', {
+        'id': page_id,
+        'url': page_data.get('url', ''),
+        'title': clean_text(page_data.get('title', '')),
+        'created_at': created_at,
+        'scraped_at': page_data.get('metadata', {}).get('scraped_at', ''),
+        'source_url': page_data.get('metadata', {}).get('source_url', '')
+    }
+
+    # Traiter les sections
+    for section_order, (section_key, section_data) in enumerate(page_data.get('sections', {}).items(), 1):
+        section_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{page_key}_{section_key}"))
+
+        yield 'sections', {
+            'id': section_id,
+            'page_id': page_id,
+            'section_id': section_key,
+            'title': clean_text(section_data.get('title', '')),
+            'content': clean_text(section_data.get('content', '')),
+            'order': section_order
+        }
+
+        # Écrire les code snippets
+        for cs_order, cs in enumerate(section_data.get('code_snippets', []), 1):
+            yield 'code_snippets', {
+                'id': str(uuid.uuid4()),
+                'section_id': section_id,
+                'code': clean_text(cs.get('code', '')),
+                'language': clean_text(cs.get('language', 'unknown')),
+                'order': cs_order
+            }
+
+        # Écrire les images
+        for img_order, img in enumerate(section_data.get('images', []), 1):
+            yield 'images', {
+                'id': str(uuid.uuid4()),
+                'section_id': section_id,
+                'url': img if isinstance(img, str) else img.get('url', ''),
+                'alt_text': '' if isinstance(img, str) else img.get('alt_text', ''),
+                'order': img_order
+            }
+
+        # Écrire les tips
+        for tip_order, tip in enumerate(section_data.get('tips', []), 1):
+            if tip:  # Ne traiter que si le tip n'est pas vide
+                yield 'tips', {
+                    'id': str(uuid.uuid4()),
+                    'section_id': section_id,
+                    'content': clean_text(tip),
+                    'order': tip_order
+                }
+
+def write_rows(rows, mode, formats=('csv',)):
+    """Écrit les lignes dans les 5 tables, en CSV et/ou en Parquet
+
+    `mode` s'applique aux CSV ('w' : fichiers recréés, 'a' : ajout) ; les
+    fichiers Parquet sont toujours réécrits en entier. Retourne le nombre de
+    lignes écrites.
+    """
+    count = 0
+    files = {}
+    if 'csv' in formats:
+        files = {table: open(csv_path(table), mode, newline='', encoding='utf-8') for table in FIELDNAMES}
+    parquet = ParquetTables(FIELDNAMES) if 'parquet' in formats else None
+    completed = False
+    try:
+        writers = {table: csv.DictWriter(f, fieldnames=FIELDNAMES[table]) for table, f in files.items()}
+        if mode == 'w':
+            for writer in writers.values():
+                writer.writeheader()
+        for table, row in rows:
+            if files:
+                writers[table].writerow(row)
+            if parquet:
+                parquet.write(table, row)
+            count += 1
+        completed = True
+    finally:
+        for f in files.values():
+            f.close()
+        if parquet:
+            parquet.close(discard=not completed)
+    return count
+
+def drop_pages(page_ids):
+    """Retire des CSV existants toutes les lignes rattachées aux pages données"""
+    with open(csv_path('sections'), 'r', newline='', encoding='utf-8') as f:
+        section_ids = {row['id'] for row in csv.DictReader(f) if row['page_id'] in page_ids}
+
+    keys = {'pages': ('id', page_ids), 'sections': ('page_id', page_ids)}
+    for table, fieldnames in FIELDNAMES.items():
+        column, stale = keys.get(table, ('section_id', section_ids))
+        tmp_path = f"{csv_path(table)}.tmp"
+        with open(csv_path(table), 'r', newline='', encoding='utf-8') as src, \
+             open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(row for row in csv.DictReader(src) if row[column] not in stale)
+        os.replace(tmp_path, csv_path(table))
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion de l'export Firebase en tables CSV")
+    parser.add_argument('input', nargs='?', default=INPUT_FILE)
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne met à jour que les lignes des pages modifiées ou supprimées")
+    parser.add_argument('--format', choices=('csv', 'parquet', 'all'), default='csv',
+                        help="Format des tables générées (Parquet : pyarrow requis)")
+    args = parser.parse_args()
+    formats = ('csv', 'parquet') if args.format == 'all' else (args.format,)
+
+    start_time = time.time()
+    manifest = Manifest(MANIFEST_FILE)
+
+    def tracked(pages, only_changed=False):
+        """Met à jour le manifeste au passage de chaque page (une seule en mémoire)"""
+        for page_key, page_data in pages:
+            digest = content_hash(page_data)
+            changed = manifest.is_changed(page_key, digest)
+            manifest.update(page_key, digest, page_id_for(page_key))
+            if changed or not only_changed:
+                yield page_key, page_data
+
+    csv_exist = all(os.path.exists(csv_path(table)) for table in FIELDNAMES)
+    if args.incremental and csv_exist and 'csv' in formats:
+        # Première lecture : seules les clés des pages modifiées sont conservées
+        _, pages = read_export(args.input)
+        changed = {page_key for page_key, _ in tracked(pages, only_changed=True)}
+        removed = manifest.prune()
+
+        stale_ids = {page_id_for(page_key) for page_key in changed}
+        stale_ids |= {page_id for _, page_id in removed}
+        if stale_ids:
+            drop_pages(stale_ids)
+
+        created_at, pages = read_export(args.input)
+        row_count = write_rows((row for page_key, page_data in pages if page_key in changed
+                                for row in page_rows(page_key, page_data, created_at)), 'a')
+        print(f"Mise à jour incrémentale : {len(changed)} page(s) modifiée(s), {len(removed)} supprimée(s)")
+
+        # Un fichier Parquet ne se modifie pas en place : les tables sont réécrites
+        if 'parquet' in formats:
+            created_at, pages = read_export(args.input)
+            row_count += write_rows((row for page_key, page_data in pages
+                                     for row in page_rows(page_key, page_data, created_at)), 'w', ('parquet',))
+    else:
+        created_at, pages = read_export(args.input)
+        row_count = write_rows((row for page_key, page_data in tracked(pages)
+                                for row in page_rows(page_key, page_data, created_at)), 'w', formats)
+        manifest.prune()
+        extension = ', '.join(f"*.{fmt}" for fmt in formats)
+        print(f"Conversion terminée ! Tables générées ({extension}) : pages, sections, code_snippets, images, tips")
+
+    elapsed = time.time() - start_time
+    print(f"{row_count} lignes écrites en {elapsed:.2f} s ({row_count / max(elapsed, 1e-6):.0f} lignes/s)")
+    manifest.save()
+
+if __name__ == "__main__":
+    main()
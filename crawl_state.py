@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import time
+
+from frontier import Frontier, canonicalize_url
+
+# Configuration
+STATE_DIR = ".crawl_state"
+CHECKPOINT_INTERVAL = 10  # Secondes entre deux validations de l'état sur disque
+MEMORY_QUEUE = 10000  # URLs en attente gardées en mémoire, le reste de la file attend sur disque
+
+# Statut d'une URL
+QUEUED = 'queued'  # Découverte, en file ou en cours de traitement
+DONE = 'done'  # Traitée et sa page écrite
+FAILED = 'failed'  # Abandonnée (erreur définitive ou trop de nouveaux essais)
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    UNIQUE (site, url)
+);
+CREATE INDEX IF NOT EXISTS urls_status ON urls (site, status, id);
+"""
+
+
+def state_path(name):
+    """Chemin du fichier d'état d'un scraper"""
+    return os.path.join(STATE_DIR, f"{name}.sqlite")
+
+
+class CrawlState:
+    """État d'exploration sur disque (SQLite) : URLs découvertes par site et statut de chacune
+
+    Les modifications sont validées toutes les `interval` secondes et à la
+    fermeture ; `on_checkpoint` (ex. le fsync du journal de sortie) est appelé
+    juste avant, pour qu'une URL marquée DONE sur disque ait toujours sa page
+    écrite. Une interruption ne fait donc perdre que le travail des dernières
+    secondes. Sans `resume`, l'état d'une exécution précédente est effacé ;
+    avec `resume`, les URLs abandonnées sont remises en file.
+    """
+
+    def __init__(self, path, resume=False, on_checkpoint=None, interval=CHECKPOINT_INTERVAL):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.on_checkpoint = on_checkpoint
+        self.interval = interval
+        self.checkpointed_at = time.monotonic()
+
+        if resume:
+            self.db.execute("UPDATE urls SET status = ?, attempts = 0 WHERE status = ?", (QUEUED, FAILED))
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+            if counts:
+                print(f"⏯️ Reprise de l'exploration : {counts.get(DONE, 0)} URL(s) traitée(s), "
+                      f"{counts.get(QUEUED, 0)} en attente ({path})")
+        else:
+            self.db.execute("DELETE FROM urls")
+        self.db.commit()
+
+    def add(self, site, url, depth=0):
+        """Enregistre une URL en attente ; retourne son numéro d'ordre, ou None si elle est déjà connue"""
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO urls (site, url, depth, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (site, url, depth, QUEUED, time.time())
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def contains(self, site, url):
+        return self.db.execute("SELECT 1 FROM urls WHERE site = ? AND url = ?", (site, url)).fetchone() is not None
+
+    def mark(self, site, url, status, attempts=None):
+        """Change le statut d'une URL (et son nombre d'essais), puis valide si l'intervalle est écoulé"""
+        self.db.execute(
+            "UPDATE urls SET status = ?, attempts = COALESCE(?, attempts), updated_at = ? WHERE site = ? AND url = ?",
+            (status, attempts, time.time(), site, url)
+        )
+        if time.monotonic() - self.checkpointed_at >= self.interval:
+            self.checkpoint()
+
+    def count(self, site, status=None):
+        if status is None:
+            return self.db.execute("SELECT COUNT(*) FROM urls WHERE site = ?", (site,)).fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE site = ? AND status = ?",
+                               (site, status)).fetchone()[0]
+
+    def counts(self, site):
+        """Nombre d'URLs par (profondeur, statut)"""
+        return self.db.execute("SELECT depth, status, COUNT(*) FROM urls WHERE site = ? GROUP BY depth, status",
+                               (site,)).fetchall()
+
+    def queued(self, site, after=0, limit=None):
+        """URLs en attente dans l'ordre de découverte : liste de (numéro, url, profondeur)"""
+        return self.db.execute(
+            "SELECT id, url, depth FROM urls WHERE site = ? AND status = ? AND id > ? ORDER BY id LIMIT ?",
+            (site, QUEUED, after, -1 if limit is None else limit)
+        ).fetchall()
+
+    def urls(self, site, status=DONE):
+        """URLs d'un statut, triées"""
+        for (url,) in self.db.execute("SELECT url FROM urls WHERE site = ? AND status = ? ORDER BY url",
+                                      (site, status)):
+            yield url
+
+    def checkpoint(self):
+        if self.on_checkpoint:
+            self.on_checkpoint()
+        self.db.commit()
+        self.checkpointed_at = time.monotonic()
+
+    def frontier(self, site, memory_queue=MEMORY_QUEUE):
+        return PersistentFrontier(self, site, memory_queue)
+
+    def close(self):
+        self.checkpoint()
+        self.db.close()
+
+
+class PersistentFrontier(Frontier):
+    """Frontier adossée à un CrawlState : file et URLs vues sur disque, mémoire bornée
+
+    La déduplication interroge la base et seules `memory_queue` URLs en attente
+    sont gardées en mémoire : les suivantes restent sur disque et sont
+    rechargées dans l'ordre de découverte (BFS) quand la file se vide. En
+    reprise, les URLs déjà traitées ne sont plus redemandées et la file
+    repart des URLs restées en attente.
+    """
+
+    def __init__(self, state, site, memory_queue=MEMORY_QUEUE):
+        super().__init__()
+        self.state = state
+        self.site = site
+        self.memory_queue = memory_queue
+        self.loaded = 0  # Numéro de la dernière URL en attente chargée en mémoire
+        self.on_disk = state.count(site, QUEUED)  # URLs en attente restées sur disque
+        for depth, status, count in state.counts(site):
+            self.discovered[depth] += count
+            if status == DONE:
+                self.fetched[depth] += count
+
+    def __len__(self):
+        return super().__len__() + self.on_disk
+
+    def __contains__(self, url):
+        return self.state.contains(self.site, canonicalize_url(url))
+
+    def add(self, url, depth=0):
+        url = canonicalize_url(url)
+        number = self.state.add(self.site, url, depth)
+        if number is None:
+            return False
+        self.discovered[depth] += 1
+        if self.on_disk or len(self.queue) >= self.memory_queue:
+            # File pleine (ou URLs plus anciennes déjà sur disque) : l'URL attend dans la base
+            self.on_disk += 1
+        else:
+            self.queue.append((url, depth))
+            self.loaded = number
+        return True
+
+    def refill(self):
+        """Recharge en mémoire les plus anciennes URLs en attente sur disque"""
+        limit = self.memory_queue - len(self.queue)
+        rows = self.state.queued(self.site, after=self.loaded, limit=limit)
+        for number, url, depth in rows:
+            self.queue.append((url, depth))
+            self.loaded = number
+        self.on_disk = max(self.on_disk - len(rows), 0) if len(rows) == limit else 0
+
+    def pop(self):
+        if not self.queue and self.on_disk:
+            self.refill()
+        return super().pop()
+
+    def retry(self, url, depth, delay):
+        attempt = super().retry(url, depth, delay)
+        self.state.mark(self.site, url, QUEUED, attempt)
+        return attempt
+
+    def mark_fetched(self, url, depth):
+        self.fetched[depth] += 1
+        self.state.mark(self.site, url, DONE)
+
+    def mark_failed(self, url, depth):
+        super().mark_failed(url, depth)
+        self.state.mark(self.site, url, FAILED)
+
+    def visited(self):
+        return list(self.state.urls(self.site))
@@ -0,0 +1,268 @@
+import asyncio
+import contextlib
+import inspect
+import time
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from frontier import Frontier, canonicalize_url
+from html_parser import extract_hrefs
+from http_cache import ResponseCache
+from metrics import METRICS_HOST, Metrics, RequestTrace, report_path
+from politeness import (MAX_RETRIES, HostPolicy, backoff_delay, is_retryable, parse_retry_after, retry_after_of,
+                        wait_changed)
+from sitemap import discover_urls, fetch_robots
+from transport import describe, make_client
+
+# Configuration
+MAX_CONCURRENCY = 8  # Nombre maximum de requêtes simultanées par site
+SKIPPED_PREFIXES = ('javascript:', 'mailto:', 'tel:', '#')
+
+
+def filter_links(hrefs, base_url):
+    """Garde les liens internes (même préfixe), en forme canonique sans fragment"""
+    links = []
+    for href in hrefs:
+        if not href or href.startswith(SKIPPED_PREFIXES):
+            continue
+
+        absolute_url = canonicalize_url(urljoin(base_url, href))
+        if absolute_url.startswith(base_url):
+            links.append(absolute_url)
+    return links
+
+
+def extract_links(html, base_url):
+    """Retourne les liens internes d'une page"""
+    return filter_links(extract_hrefs(html), base_url)
+
+
+async def crawl_site(client, base_url, policy, max_concurrency=MAX_CONCURRENCY, extract=None, write=None,
+                     cache=None, sitemap=None, skip=frozenset(), metrics=None, state=None, on_discover=None):
+    """Explore un site en parallèle (BFS) et retourne la liste triée des URLs visitées
+
+    Chaque page n'est téléchargée et parsée qu'une fois : ses liens alimentent la
+    file (amorcée par `sitemap`, liste de (url, lastmod)) et `extract(url, html)`
+    produit le `page_data` transmis à `write` (fonction ou coroutine). Cadence et
+    nouveaux essais suivent `policy` (HostPolicy) ; `cache` (ResponseCache),
+    `metrics` (Metrics) et `state` (CrawlState) sont facultatifs. Les URLs de
+    `skip` ne sont explorées que pour leurs liens ; `on_discover(url)` est
+    appelée pour chaque URL découverte, même si sa page échoue ensuite.
+    """
+    base_url = canonicalize_url(base_url)
+    metrics = metrics or Metrics()
+    frontier = state.frontier(base_url) if state else Frontier()
+
+    def enqueue(url, depth=0):
+        if frontier.add(url, depth) and on_discover:
+            on_discover(canonicalize_url(url))
+
+    enqueue(base_url)
+    lastmods = {}
+    for url, lastmod in sitemap or []:
+        enqueue(url)
+        lastmods[canonicalize_url(url)] = lastmod
+    in_flight = 0
+    abandoned = []
+    changed = asyncio.Condition()
+
+    async def next_item():
+        nonlocal in_flight
+        async with changed:
+            while True:
+                if item := frontier.pop():
+                    in_flight += 1
+                    return item
+                retry_in = frontier.next_retry_in()
+                if not in_flight and retry_in is None:
+                    return None
+                # Réveil à la fin d'une page ou quand un nouvel essai devient disponible
+                await wait_changed(changed, retry_in)
+
+    async def worker():
+        nonlocal in_flight
+        while item := await next_item():
+            url, depth = item
+            host = urlsplit(url).netloc
+            try:
+                entry = cache.get(url) if cache else None
+                lastmod = lastmods.get(url)
+                resumed = url in skip
+                if entry and resumed:
+                    # Déjà écrite par une exécution interrompue : seuls ses liens sont utiles
+                    links, page_data = entry['links'], None
+                    metrics.count('cache_hits', host=host)
+                elif entry and lastmod and entry['fetched_at'] >= lastmod:
+                    # Non modifiée d'après le sitemap : aucune requête
+                    cache.touch(url, revalidated=False)
+                    links, page_data = entry['links'], entry['record']
+                    metrics.count('cache_hits', host=host)
+                else:
+                    with metrics.timer('wait', host):
+                        await policy.acquire()
+                    print(f"🔍 Exploration de: {url}")
+                    trace = RequestTrace()
+                    start = time.monotonic()
+                    try:
+                        with metrics.timer('fetch', host):
+                            response = await client.get(url, headers=ResponseCache.conditional_headers(entry),
+                                                        extensions={'trace': trace})
+                    except Exception:
+                        # Toute erreur (réseau, boucle de redirections, décodage...) rend la place de l'hôte
+                        await policy.release(time.monotonic() - start)
+                        raise
+                    await policy.release(time.monotonic() - start, response.status_code,
+                                         parse_retry_after(response.headers.get('Retry-After')))
+                    for phase, seconds in trace.phases().items():
+                        metrics.observe(phase, seconds, host)
+                    metrics.count('bytes', response.num_bytes_downloaded, host=host)
+                    metrics.count('responses', host=host, kind=response.http_version)
+
+                    if response.status_code == 304 and entry:
+                        # Page inchangée : liens et contenu repris du cache, sans parsing
+                        cache.touch(url)
+                        links, page_data = entry['links'], entry['record']
+                        metrics.count('cache_hits', host=host)
+                    else:
+                        response.raise_for_status()
+                        if cache:
+                            metrics.count('cache_misses', host=host)
+                        with metrics.timer('parse', host):
+                            links = extract_links(response.text, base_url)
+                        page_data = None
+                        if extract and not resumed:
+                            with metrics.timer('extract', host):
+                                page_data = extract(url, response.text)
+                        if cache and not resumed:
+                            cache.store(url, response.headers, response.text, links, page_data)
+
+                for link in links:
+                    enqueue(link, depth + 1)
+
+                if page_data and not resumed:
+                    # `write` peut être une coroutine (ex. file de rendu pleine : l'exploration attend)
+                    with metrics.timer('write', host):
+                        if inspect.isawaitable(result := write(page_data)):
+                            await result
+                frontier.mark_fetched(url, depth)
+                metrics.count('pages', host=host)
+
+            except Exception as e:
+                kind = f"http_{e.response.status_code}" if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                metrics.count('errors', host=host, kind=kind)
+                if is_retryable(e) and frontier.attempts[url] < MAX_RETRIES:
+                    # Échec passager : l'URL est remise en file plutôt que perdue
+                    delay = backoff_delay(frontier.attempts[url] + 1, retry_after_of(e))
+                    attempt = frontier.retry(url, depth, delay)
+                    metrics.count('retries', host=host)
+                    print(f"🔁 {url} : {str(e)}, nouvel essai {attempt}/{MAX_RETRIES} dans {delay:.1f} s")
+                else:
+                    frontier.mark_failed(url, depth)
+                    if is_retryable(e):
+                        abandoned.append(url)
+                    print(f"⚠️ Erreur avec {url}: {str(e)}")
+            finally:
+                async with changed:
+                    in_flight -= 1
+                    changed.notify_all()
+
+    await asyncio.gather(*[worker() for _ in range(max_concurrency)])
+
+    for depth, counts in frontier.stats().items():
+        print(f"📈 {base_url} profondeur {depth}: {counts['discovered']} découverte(s), "
+              f"{counts['fetched']} explorée(s), {counts['failed']} erreur(s), {counts['retried']} nouvel(s) essai(s)")
+    if abandoned:
+        print(f"❌ {len(abandoned)} URL(s) abandonnée(s) après {MAX_RETRIES} nouveaux essais : {', '.join(abandoned)}")
+
+    return frontier.visited()
+
+
+async def crawl_sites(base_urls, headers, delay, max_concurrency=MAX_CONCURRENCY, extract=None, write=None,
+                      cache=None, use_sitemap=True, skip=frozenset(), metrics=None, client=None, state=None,
+                      on_discover=None):
+    """Explore plusieurs sites simultanément, avec une cadence adaptée à chaque hôte
+
+    `delay` est l'intervalle de départ entre deux requêtes d'un hôte : il se
+    réduit tant que l'hôte répond vite et sans erreur, et s'allonge sur 429 /
+    5xx (voir politeness.HostPolicy). Avec `use_sitemap`, robots.txt et les
+    sitemaps de chaque site sont lus d'abord : ils amorcent l'exploration et
+    l'intervalle ne descend jamais sous le Crawl-delay.
+
+    Découverte et extraction passent par un même client (transport.make_client :
+    connexions persistantes par hôte, HTTP/2 si disponible) ; un `client` déjà
+    ouvert peut être fourni pour partager ses connexions entre plusieurs appels.
+
+    `state` (crawl_state.CrawlState) rend l'exploration reprenable, voir crawl_site.
+    """
+    metrics = metrics or Metrics()
+    if client is None:
+        print(f"🌐 Transport : {describe()}")
+        session = make_client(headers, max_connections=max_concurrency * len(base_urls))
+    else:
+        session = contextlib.nullcontext(client)
+    async with session as client:
+        policies = {}
+        sitemaps = {}
+        for base_url in base_urls:
+            host = urlsplit(base_url).netloc
+            crawl_delay = None
+            if use_sitemap:
+                with metrics.timer('discovery', host):
+                    robots = await fetch_robots(client, base_url)
+                    sitemaps[base_url] = await discover_urls(client, base_url, robots)
+                crawl_delay = robots['crawl_delay']
+            policies.setdefault(host, HostPolicy(delay, crawl_delay, max_concurrency))
+
+        results = await asyncio.gather(*[
+            crawl_site(client, base_url, policies[urlsplit(base_url).netloc],
+                       max_concurrency, extract, write, cache, sitemaps.get(base_url), skip, metrics, state,
+                       on_discover)
+            for base_url in base_urls
+        ])
+
+    for host, policy in policies.items():
+        print(f"🚦 {host} : {policy.summary()}")
+    return results
+
+
+def get_all_urls(*base_urls, headers, delay, max_concurrency=MAX_CONCURRENCY):
+    """Point d'entrée synchrone : une liste d'URLs triée par site exploré"""
+    return asyncio.run(crawl_sites(base_urls, headers, delay, max_concurrency))
+
+
+def add_crawl_arguments(parser, name):
+    """Options communes aux scrapers WeWeb : concurrence, rapport d'exécution et métriques"""
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY,
+                        help="Requêtes simultanées maximum par site (taille du pool de connexions)")
+    parser.add_argument('--report', default=report_path(name),
+                        help="Rapport d'exécution JSON (durées par étape et par hôte, débit, cache, erreurs)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Expose les métriques au format Prometheus sur ce port pendant le scraping")
+    parser.add_argument('--metrics-host', default=METRICS_HOST,
+                        help="Adresse d'écoute des métriques (0.0.0.0 : accessible depuis le réseau)")
+
+
+def start_metrics(name, args):
+    """Metrics du scraper, servies en HTTP si `--metrics-port` est donné"""
+    metrics = Metrics(name)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port, args.metrics_host)
+    return metrics
+
+
+def run_pipeline(*base_urls, headers, delay, extract, write, max_concurrency=MAX_CONCURRENCY, cache=None,
+                 skip=frozenset(), metrics=None, state=None, on_discover=None):
+    """Exploration et extraction en une seule passe : chaque `page_data` est envoyé à `write`
+
+    L'état est validé à la sortie, même interrompue (Ctrl+C), pour une reprise avec `--resume`.
+    """
+    try:
+        return asyncio.run(crawl_sites(base_urls, headers, delay, max_concurrency, extract, write, cache,
+                                       skip=frozenset(skip), metrics=metrics, state=state,
+                                       on_discover=on_discover))
+    finally:
+        if cache:
+            cache.close()
+        if state:
+            state.close()
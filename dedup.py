@@ -0,0 +1,130 @@
+import argparse
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from chunker import iter_chunks
+
+# Configuration
+NEAR_THRESHOLD = 0.85  # Similarité de Jaccard estimée au-delà de laquelle deux blocs sont des quasi-doublons
+NUM_PERMUTATIONS = 64
+BANDS = 16  # Bandes LSH (NUM_PERMUTATIONS / BANDS lignes par bande)
+SHINGLE_WORDS = 5
+MIN_NEAR_WORDS = 20  # Les blocs plus courts ne sont comparés qu'à l'identique
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_text(text):
+    """Texte comparable : minuscules, ponctuation et espaces multiples retirés"""
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def normalize_code(text):
+    """Code comparable : seuls les espaces sont normalisés (opérateurs et casse sont significatifs)"""
+    return ' '.join(text.split())
+
+
+def text_hash(text, kind='text'):
+    """Empreinte d'un bloc ; le code n'est pas comparé comme de la prose (`a < b` ≠ `a > b`)"""
+    normalized = normalize_code(text) if kind == 'code' else normalize_text(text)
+    return hashlib.blake2b(f"{kind}:{normalized}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+class MinHasher:
+    """Signatures MinHash sur des shingles de mots, par permutations universelles"""
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_permutations, dtype=np.uint64)
+
+    def signature(self, words):
+        shingles = {' '.join(words[i:i + SHINGLE_WORDS])
+                    for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+        hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+        # (a * x + b) mod p, sur 64 bits : x < 2^32 et a < 2^61 débordent, ce qui reste une bonne permutation
+        return ((np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+
+class Deduplicator:
+    """Repère les blocs déjà vus, à l'identique (empreinte du texte normalisé) ou presque (MinHash + LSH)
+
+    `check(key, text, kind)` enregistre le bloc et retourne la clé du premier bloc
+    identique ou quasi identique, ou None si le bloc est nouveau : le contenu
+    partagé n'est ainsi stocké (ou encodé) qu'une fois et référencé ensuite.
+    Le code (`kind='code'`) n'est dédupliqué qu'à l'identique, espaces près.
+    """
+
+    def __init__(self, near=False, threshold=NEAR_THRESHOLD, bands=BANDS):
+        self.exact = {}
+        self.threshold = threshold
+        self.minhasher = MinHasher() if near else None
+        self.rows = NUM_PERMUTATIONS // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+        self.stats = {'blocks': 0, 'exact': 0, 'near': 0}
+
+    def check(self, key, text, kind='text'):
+        self.stats['blocks'] += 1
+        digest = text_hash(text, kind)
+        if digest in self.exact:
+            self.stats['exact'] += 1
+            return self.exact[digest]
+        self.exact[digest] = key
+
+        if self.minhasher is None or kind == 'code':
+            return None
+        words = normalize_text(text).split()
+        if len(words) < MIN_NEAR_WORDS:
+            return None
+
+        signature = self.minhasher.signature(words)
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                     for band in range(len(self.buckets))]
+        candidates = set()
+        for bucket, band_key in zip(self.buckets, band_keys):
+            candidates.update(bucket.get(band_key, ()))
+
+        for candidate in candidates:
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                self.stats['near'] += 1
+                return candidate
+
+        for bucket, band_key in zip(self.buckets, band_keys):
+            bucket.setdefault(band_key, []).append(key)
+        self.signatures[key] = signature
+        return None
+
+    def summary(self):
+        duplicates = self.stats['exact'] + self.stats['near']
+        share = duplicates / max(self.stats['blocks'], 1)
+        return (f"{self.stats['blocks']} blocs, {self.stats['exact']} doublon(s) exact(s), "
+                f"{self.stats['near']} quasi-doublon(s) ({share:.1%} non stockés)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapport des blocs dupliqués entre les pages d'un export")
+    parser.add_argument('inputs', nargs='+')
+    parser.add_argument('--near', action='store_true', help="Détecte aussi les quasi-doublons (MinHash)")
+    parser.add_argument('--top', type=int, default=10, help="Nombre de blocs partagés affichés")
+    args = parser.parse_args()
+
+    deduplicator = Deduplicator(near=args.near)
+    shared = {}
+    texts = {}
+    for chunk in iter_chunks(args.inputs):
+        canonical = deduplicator.check(chunk['id'], chunk['text'], chunk['kind'])
+        if canonical:
+            shared[canonical] = shared.get(canonical, 0) + 1
+        else:
+            texts[chunk['id']] = chunk['text'][:80]
+
+    print(f"🧬 {deduplicator.summary()}")
+    for canonical, count in sorted(shared.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   ×{count + 1}  {texts[canonical]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import sqlite3
+import time
+
+from convertScript import normalize_page, read_export
+from manifest import content_hash
+
+# Configuration
+DOCSTORE_FILE = "docs.sqlite"
+BATCH_SIZE = 200  # Pages écrites par transaction
+SEARCH_LIMIT = 10
+BM25_WEIGHTS = (5.0, 3.0, 1.0, 0.5)  # Poids des colonnes : titre de page, titre de section, texte, code
+
+SCHEMA = """
+PRAGMA foreign_keys = ON;
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    scraped_at TEXT,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    page_url TEXT NOT NULL REFERENCES pages (url) ON DELETE CASCADE,
+    section_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS sections_page_url ON sections (page_url);
+CREATE TABLE IF NOT EXISTS code_snippets (
+    section INTEGER NOT NULL REFERENCES sections (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    code TEXT,
+    language TEXT
+);
+CREATE INDEX IF NOT EXISTS code_snippets_section ON code_snippets (section);
+CREATE TABLE IF NOT EXISTS images (
+    section INTEGER NOT NULL REFERENCES sections (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS images_section ON images (section);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    page_title, title, content, code,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def fts_query(text):
+    """Requête FTS5 à partir d'un texte libre : chaque mot doit apparaître"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+class DocStore:
+    """Base SQLite des pages scrapées, avec index plein texte FTS5 classé par BM25
+
+    Accepte les pages au format de `scrape_page` (sections, extraits de code,
+    images) comme les enregistrements à plat {h1, url, content}. Les pages
+    sont identifiées par leur URL : une page dont l'empreinte n'a pas changé
+    n'est pas réécrite, et les écritures sont regroupées par transactions de
+    `batch_size` pages.
+    """
+
+    def __init__(self, path=DOCSTORE_FILE, batch_size=BATCH_SIZE):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.pending = 0
+
+    def delete_sections(self, url):
+        """Supprime les sections d'une page (et leurs extraits, images et entrées FTS)"""
+        self.db.execute("DELETE FROM sections_fts WHERE rowid IN (SELECT id FROM sections WHERE page_url = ?)",
+                        (url,))
+        self.db.execute("DELETE FROM sections WHERE page_url = ?", (url,))
+
+    def delete_page(self, url):
+        self.delete_sections(url)
+        self.db.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+    def upsert_page(self, record):
+        """Ajoute ou met à jour une page ; retourne False si elle est inchangée"""
+        page = normalize_page(record)
+        url = page['url']
+        digest = content_hash(record)
+        row = self.db.execute("SELECT hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row and row[0] == digest:
+            return False
+
+        self.delete_sections(url)
+        self.db.execute(
+            "INSERT INTO pages VALUES (?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+            "title = excluded.title, scraped_at = excluded.scraped_at, hash = excluded.hash",
+            (url, page.get('title', ''), page.get('metadata', {}).get('scraped_at', ''), digest)
+        )
+
+        for position, (section_key, section) in enumerate(page.get('sections', {}).items(), 1):
+            section_rowid = self.db.execute(
+                "INSERT INTO sections (page_url, section_id, position, title, content) VALUES (?, ?, ?, ?, ?)",
+                (url, section_key, position, section.get('title', ''), section.get('content', ''))
+            ).lastrowid
+
+            snippets = section.get('code_snippets', [])
+            self.db.executemany(
+                "INSERT INTO code_snippets VALUES (?, ?, ?, ?)",
+                [(section_rowid, order, snippet.get('code', ''), snippet.get('language', 'unknown'))
+                 for order, snippet in enumerate(snippets, 1)]
+            )
+            self.db.executemany(
+                "INSERT INTO images VALUES (?, ?, ?)",
+                [(section_rowid, order, image if isinstance(image, str) else image.get('url', ''))
+                 for order, image in enumerate(section.get('images', []), 1)]
+            )
+            self.db.execute(
+                "INSERT INTO sections_fts (rowid, page_title, title, content, code) VALUES (?, ?, ?, ?, ?)",
+                (section_rowid, page.get('title', ''), section.get('title', ''), section.get('content', ''),
+                 '\n'.join(snippet.get('code', '') for snippet in snippets))
+            )
+
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+        return True
+
+    def urls(self):
+        return {url for url, in self.db.execute("SELECT url FROM pages")}
+
+    def search(self, query, limit=SEARCH_LIMIT, raw=False):
+        """Sections les plus pertinentes (BM25) : dicts url, page, section, titre, extrait, score
+
+        `raw=True` transmet la requête telle quelle à FTS5 (opérateurs OR, NEAR, préfixes*).
+        Une requête sans aucun mot ne retourne rien.
+        """
+        match = query.strip() if raw else fts_query(query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        rows = self.db.execute(
+            f"""SELECT s.page_url, p.title, s.section_id, s.title,
+                       snippet(sections_fts, 2, '[', ']', '…', 16),
+                       bm25(sections_fts, {weights}) AS score
+                FROM sections_fts
+                JOIN sections s ON s.id = sections_fts.rowid
+                JOIN pages p ON p.url = s.page_url
+                WHERE sections_fts MATCH ?
+                ORDER BY score LIMIT ?""",
+            (match, limit)
+        ).fetchall()
+        return [
+            {'url': url, 'page': page_title, 'section': section_id, 'title': title,
+             'snippet': snippet, 'score': score}
+            for url, page_title, section_id, title, snippet, score in rows
+        ]
+
+    def commit(self):
+        self.db.commit()
+        self.pending = 0
+
+    def optimize(self):
+        """Fusionne les segments de l'index FTS5 (après une indexation importante)"""
+        self.commit()
+        self.db.execute("INSERT INTO sections_fts (sections_fts) VALUES ('optimize')")
+        self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+def index_files(store, paths, prune=False):
+    """Indexe des exports (JSON Firebase, tableau JSON, .jsonl, CSV Notion)"""
+    seen = set()
+    updated = 0
+    for path in paths:
+        _, pages = read_export(path)
+        for _, page_data in pages:
+            seen.add(page_data.get('url', ''))
+            updated += store.upsert_page(page_data)
+    removed = store.urls() - seen if prune else set()
+    for url in removed:
+        store.delete_page(url)
+    store.optimize()
+    return len(seen), updated, len(removed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Base SQLite plein texte de la documentation scrapée")
+    parser.add_argument('--db', default=DOCSTORE_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = commands.add_parser('index', help="Indexe un ou plusieurs exports")
+    index_parser.add_argument('inputs', nargs='+')
+    index_parser.add_argument('--prune', action='store_true',
+                              help="Supprime les pages absentes des exports indexés")
+
+    search_parser = commands.add_parser('search', help="Recherche plein texte")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--limit', type=int, default=SEARCH_LIMIT)
+    search_parser.add_argument('--raw', action='store_true', help="Syntaxe FTS5 brute")
+    args = parser.parse_args()
+
+    store = DocStore(args.db)
+    start_time = time.time()
+    try:
+        if args.command == 'index':
+            total, updated, removed = index_files(store, args.inputs, prune=args.prune)
+            print(f"🗃️ {total} page(s) lue(s), {updated} mise(s) à jour, {removed} supprimée(s) "
+                  f"en {time.time() - start_time:.2f} s")
+        elif not args.query.strip():
+            print("⚠️ Requête vide : indiquez au moins un mot à rechercher")
+        else:
+            try:
+                results = store.search(args.query, limit=args.limit, raw=args.raw)
+            except sqlite3.OperationalError as e:
+                # Syntaxe FTS5 invalide (--raw)
+                print(f"❌ Requête invalide : {str(e)}")
+                return
+            elapsed = (time.time() - start_time) * 1000
+            for result in results:
+                print(f"\n📄 {result['page']} › {result['title']}  ({result['score']:.2f})")
+                print(f"   {result['url']}#{result['section']}")
+                print(f"   {result['snippet']}")
+            print(f"\n🔎 {len(results)} résultat(s) en {elapsed:.1f} ms")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
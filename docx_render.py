@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Configuration
+RENDER_WORKERS = os.cpu_count() or 2  # Processus de génération DOCX
+MAX_PENDING_FACTOR = 2  # Rendus en attente par processus avant de ralentir l'exploration
+
+
+def timed_render(render, *args):
+    """Exécute `render(*args)` dans un processus du pool et retourne sa durée"""
+    start = time.perf_counter()
+    render(*args)
+    return time.perf_counter() - start
+
+
+class RenderPool:
+    """Génère les DOCX dans un pool de processus, hors de la boucle d'exploration
+
+    python-docx est coûteux en CPU et garde le GIL : les documents sont donc
+    construits dans d'autres processus. `submit` rend la main dès que le rendu
+    est lancé mais attend tant que `max_pending` rendus sont en cours, ce qui
+    ralentit l'exploration quand la génération ne suit pas (contre-pression).
+    Avec `metrics`, la durée de chaque rendu (mesurée dans le processus qui
+    l'exécute) alimente l'étape `render`. `on_success` est appelée une fois le
+    rendu réussi (ex. mise à jour du manifeste), jamais en cas d'échec.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, max_pending=None, metrics=None):
+        # Processus démarrés à neuf : après un fork, ils garderaient ouverts les descripteurs
+        # du parent (ex. le pilote Playwright), qui ne pourrait plus se fermer
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+        self.max_pending = max_pending or workers * MAX_PENDING_FACTOR
+        self.pending = set()
+        self.failed = []
+        self.metrics = metrics
+
+    def collect(self, futures):
+        for future in futures:
+            self.pending.discard(future)
+            if future.exception() is not None:
+                self.failed.append((future.label, future.exception()))
+                if self.metrics:
+                    self.metrics.count('errors', kind='render')
+                continue
+            if self.metrics:
+                self.metrics.observe('render', future.result())
+            if future.on_success:
+                future.on_success()
+
+    async def submit(self, render, *args, label=None, on_success=None):
+        """Lance `render(*args)` dans le pool ; `render` doit être une fonction de module"""
+        while len(self.pending) >= self.max_pending:
+            await asyncio.wait([asyncio.wrap_future(future) for future in self.pending],
+                               return_when=asyncio.FIRST_COMPLETED)
+            self.collect([future for future in list(self.pending) if future.done()])
+        future = self.executor.submit(timed_render, render, *args)
+        future.label = label
+        future.on_success = on_success
+        self.pending.add(future)
+        return future
+
+    def submit_wait(self, render, *args, label=None, on_success=None):
+        """Version bloquante de `submit`, hors boucle asyncio"""
+        while len(self.pending) >= self.max_pending:
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            self.collect(done)
+        future = self.executor.submit(timed_render, render, *args)
+        future.label = label
+        future.on_success = on_success
+        self.pending.add(future)
+        return future
+
+    def close(self):
+        """Attend la fin des rendus et retourne la liste des échecs (label, exception)"""
+        done, _ = wait(self.pending)
+        self.collect(done)
+        self.executor.shutdown()
+        for label, error in self.failed:
+            print(f"❌ Rendu DOCX impossible pour {label}: {error}")
+        return self.failed
+
+
+# Les scrapers importent RenderPool : leurs fonctions de rendu sont importées à l'usage
+def render_weweb(inputs, workers=RENDER_WORKERS):
+    """Regénère weweb_docs/ depuis un export (JSON Firebase, .jsonl, tableau JSON)
+
+    Les fichiers existants sont réécrits : une page garde le nom que lui donne
+    weweb_docs/.manifest.json, les autres reçoivent un nom libre parmi ceux du
+    manifeste (et y sont ajoutées si leur rendu réussit).
+    """
+    from convertScript import read_export
+    from docx_writer import NameRegistry, sanitize_filename
+    from manifest import Manifest, content_hash
+    from scrapperV2 import MANIFEST_FILE, OUTPUT_DIR, create_docx
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = Manifest(MANIFEST_FILE)
+    artifacts = [entry['artifact'] for entry in manifest.entries.values() if entry['artifact']]
+    registry = NameRegistry(OUTPUT_DIR, taken=[os.path.basename(artifact) for artifact in artifacts])
+    pool = RenderPool(workers)
+    count = 0
+    for path in inputs:
+        _, pages = read_export(path)
+        for _, page_data in sorted(pages, key=lambda item: item[1]['url']):
+            url = page_data['url']
+            output_path = manifest.artifact(url) or registry.reserve(sanitize_filename(page_data['title']))
+            pool.submit_wait(create_docx, page_data, output_path, label=url,
+                             on_success=functools.partial(manifest.update, url, content_hash(page_data), output_path))
+            count += 1
+
+    failed = pool.close()
+    manifest.save()
+    return count, failed
+
+
+def render_n8n(inputs, workers=RENDER_WORKERS):
+    """Regénère n8n_docs_clean/ depuis le cache HTTP (blocs complets) ou un export JSON à plat"""
+    from convertScript import read_export
+    from http_cache import ResponseCache, cache_path
+    from n8n_blocks import blocks_from_html
+    from scrappern8n import docx_filename, render_docx
+
+    pool = RenderPool(workers)
+    if inputs:
+        # Export {h1, url, content} : une page = un titre et un paragraphe
+        records = [page_data for path in inputs for _, page_data in read_export(path)[1]]
+        pages = sorted((page_data['url'], page_data.get('h1', ''),
+                        [{'tag': 'p', 'text': page_data.get('content', '')}]) for page_data in records)
+    else:
+        cache = ResponseCache(cache_path('n8n_docx'))
+        pages = []
+        for url, body in cache.iter_bodies():
+            if extracted := blocks_from_html(body):
+                pages.append((url, *extracted))
+        cache.db.close()
+
+    for number, (url, title, blocks) in enumerate(sorted(pages)):
+        pool.submit_wait(render_docx, title, blocks, docx_filename(number, title), label=url)
+    return len(pages), pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regénère les DOCX depuis un crawl stocké, sans re-scraper")
+    parser.add_argument('site', choices=['weweb', 'n8n'])
+    parser.add_argument('inputs', nargs='*',
+                        help="Exports JSON / .jsonl ; pour n8n, le cache HTTP est lu si aucun export n'est donné")
+    parser.add_argument('--workers', type=int, default=RENDER_WORKERS)
+    args = parser.parse_args()
+    if args.site == 'weweb' and not args.inputs:
+        parser.error("weweb : indiquer au moins un export (ex. weweb_firebase_ready.json)")
+
+    start_time = time.time()
+    render = render_weweb if args.site == 'weweb' else render_n8n
+    count, failed = render(args.inputs, workers=args.workers)
+    print(f"\n✅ {count - len(failed)}/{count} DOCX générés en {time.time() - start_time:.2f} secondes")
+
+
+if __name__ == "__main__":
+    main()
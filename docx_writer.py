@@ -0,0 +1,107 @@
+import copy
+import functools
+import io
+import os
+import re
+
+from docx import Document
+from docx.oxml.shared import OxmlElement, qn
+from docx.shared import Pt
+
+# Configuration
+FONT_NAME = 'Calibri'
+FONT_SIZE = Pt(11)
+HYPERLINK_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+
+
+@functools.lru_cache(maxsize=None)
+def template_bytes():
+    """Document vierge déjà stylé, sérialisé une seule fois par processus"""
+    doc = Document()
+    style = doc.styles['Normal']
+    style.font.name = FONT_NAME
+    style.font.size = FONT_SIZE
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def new_document():
+    """Nouveau document ouvert depuis le modèle en mémoire (ni disque ni configuration de style)"""
+    return Document(io.BytesIO(template_bytes()))
+
+
+@functools.lru_cache(maxsize=None)
+def hyperlink_run_template():
+    """Run bleu souligné des liens, construit une seule fois"""
+    run = OxmlElement('w:r')
+    rPr = OxmlElement('w:rPr')
+    color = OxmlElement('w:color')
+    color.set(qn('w:val'), '0000EE')
+    underline = OxmlElement('w:u')
+    underline.set(qn('w:val'), 'single')
+    rPr.append(color)
+    rPr.append(underline)
+    run.append(rPr)
+    run.append(OxmlElement('w:t'))
+    return run
+
+
+def add_hyperlink(paragraph, url, text):
+    """Ajoute un lien cliquable dans un paragraphe Word."""
+    r_id = paragraph.part.relate_to(url, HYPERLINK_REL, is_external=True)
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), r_id)
+    run = copy.deepcopy(hyperlink_run_template())
+    run[-1].text = text
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def add_table(doc, rows, style=None):
+    """Tableau créé d'un coup aux bonnes dimensions puis rempli, sans ajout de colonnes"""
+    width = max((len(row) for row in rows), default=0)
+    if not width:
+        return None
+    table = doc.add_table(rows=len(rows), cols=width)
+    if style:
+        table.style = style
+    cells = table._cells  # Liste à plat des cellules : table.cell(r, c) la recalcule à chaque appel
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            cells[r * width + c].text = value
+    return table
+
+
+class NameRegistry:
+    """Noms de fichiers libres d'un dossier, attribués en mémoire
+
+    Le dossier n'est lu qu'une fois ; chaque nom de base garde son prochain
+    suffixe (`nom.docx`, `nom_1.docx`, ...), sans test `os.path.exists` en boucle.
+    `taken` remplace le contenu du dossier (ex. les noms d'un manifeste, pour
+    réécrire les fichiers existants plutôt que d'en créer des copies).
+    """
+
+    def __init__(self, directory, extension='.docx', taken=None):
+        self.directory = directory
+        self.extension = extension
+        if taken is not None:
+            self.taken = set(taken)
+        else:
+            self.taken = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+        self.counters = {}
+
+    def reserve(self, base):
+        counter = self.counters.get(base, 0)
+        name = f"{base}{self.extension}" if not counter else f"{base}_{counter}{self.extension}"
+        while name in self.taken:
+            counter += 1
+            name = f"{base}_{counter}{self.extension}"
+        self.counters[base] = counter + 1
+        self.taken.add(name)
+        return os.path.join(self.directory, name)
+
+
+def sanitize_filename(filename):
+    filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
+    return filename[:50].strip()
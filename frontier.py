@@ -0,0 +1,108 @@
+import heapq
+import time
+from collections import Counter, deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+INDEX_PAGES = ('index.html', 'index.htm')
+
+
+def canonicalize_url(url):
+    """Forme canonique d'une URL pour la déduplication
+
+    Schéma et hôte en minuscules, port par défaut retiré, fragment supprimé,
+    `index.html` et slash final retirés, paramètres de requête triés.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path
+    for index_page in INDEX_PAGES:
+        if path.endswith('/' + index_page):
+            path = path[:-len(index_page)]
+            break
+    path = path.rstrip('/')
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+class Frontier:
+    """File d'exploration BFS avec déduplication en O(1) et statistiques par profondeur
+
+    Une URL en échec passager peut être remise en file avec `retry` : elle
+    redevient disponible après l'attente demandée.
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.delayed = []  # Tas de (disponible à, url, profondeur)
+        self.seen = set()
+        self.done = set()
+        self.attempts = Counter()
+        self.discovered = Counter()
+        self.fetched = Counter()
+        self.failed = Counter()
+        self.retried = Counter()
+
+    def __len__(self):
+        return len(self.queue) + len(self.delayed)
+
+    def __contains__(self, url):
+        return canonicalize_url(url) in self.seen
+
+    def add(self, url, depth=0):
+        """Ajoute une URL si elle n'a jamais été vue ; retourne True si elle est nouvelle"""
+        url = canonicalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self.queue.append((url, depth))
+        self.discovered[depth] += 1
+        return True
+
+    def pop(self):
+        """Prochaine URL à explorer sous la forme (url, profondeur), ou None"""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, url, depth = heapq.heappop(self.delayed)
+            self.queue.append((url, depth))
+        return self.queue.popleft() if self.queue else None
+
+    def retry(self, url, depth, delay):
+        """Remet une URL en file pour un nouvel essai dans `delay` secondes ; retourne le n° d'essai"""
+        self.attempts[url] += 1
+        self.retried[depth] += 1
+        heapq.heappush(self.delayed, (time.monotonic() + delay, url, depth))
+        return self.attempts[url]
+
+    def next_retry_in(self):
+        """Secondes avant le prochain nouvel essai disponible, ou None s'il n'y en a pas"""
+        return max(self.delayed[0][0] - time.monotonic(), 0) if self.delayed else None
+
+    def mark_fetched(self, url, depth):
+        """URL traitée : appelée après l'écriture de sa page"""
+        self.fetched[depth] += 1
+        self.done.add(url)
+
+    def mark_failed(self, url, depth):
+        self.failed[depth] += 1
+
+    def visited(self):
+        """Liste triée des URLs explorées avec succès"""
+        return sorted(self.done)
+
+    def stats(self):
+        """Statistiques par profondeur : URLs découvertes, explorées et en erreur"""
+        return {
+            depth: {
+                'discovered': self.discovered[depth],
+                'fetched': self.fetched[depth],
+                'failed': self.failed[depth],
+                'retried': self.retried[depth]
+            }
+            for depth in sorted(self.discovered)
+        }
@@ -0,0 +1,44 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Parseur le plus rapide disponible : lxml (C) sinon html.parser (pur Python)
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+# Extraction du contenu : lxml répare autrement le balisage mal formé (ex. <div> dans <p>)
+# et changerait le découpage en sections ; seule la détection des liens profite de lxml
+CONTENT_PARSER = 'html.parser'
+
+# selectolax (Lexbor) sert uniquement à la détection des liens, sans arbre BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+def make_soup(html, parse_only=None, parser=None):
+    """Construit un arbre BeautifulSoup avec le parseur configuré"""
+    return BeautifulSoup(html, parser or DEFAULT_PARSER, parse_only=parse_only)
+
+
+def parse_content(html, containers, extra=('title',), parser=None):
+    """Parse uniquement les conteneurs de contenu (et `extra`, ex. <title>)
+
+    Les éléments hors de ces conteneurs ne sont pas construits en mémoire. Si
+    aucun conteneur n'est présent dans la page, le document complet est parsé
+    pour que l'extraction reste identique.
+    """
+    parser = parser or CONTENT_PARSER
+    soup = make_soup(html, SoupStrainer(list(extra) + list(containers)), parser)
+    if soup.find(list(containers)) is None:
+        return make_soup(html, parser=parser)
+    return soup
+
+
+def extract_hrefs(html, parser=None):
+    """Valeurs des attributs href des liens <a>, dans l'ordre du document"""
+    if LexborHTMLParser is not None and parser is None:
+        return [node.attributes.get('href') or '' for node in LexborHTMLParser(html).css('a[href]')]
+    soup = make_soup(html, SoupStrainer('a', href=True), parser)
+    return [a['href'] for a in soup.find_all('a', href=True)]
@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from frontier import canonicalize_url
+
+# Configuration
+CACHE_DIR = ".http_cache"
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # Taille maximale des corps stockés (éviction LRU au-delà)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB,
+    size INTEGER NOT NULL,
+    links TEXT,
+    record TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def cache_path(name):
+    """Chemin du fichier de cache d'un scraper (un cache par format de sortie)"""
+    return os.path.join(CACHE_DIR, f"{name}.sqlite")
+
+
+class ResponseCache:
+    """Cache HTTP sur disque, indexé par URL canonique, avec revalidation ETag / Last-Modified
+
+    Chaque entrée conserve le corps de la réponse, ses validateurs, les liens
+    sortants et l'enregistrement extrait : une réponse 304 permet ainsi d'éviter
+    à la fois le téléchargement et le parsing de la page.
+    """
+
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def get(self, url):
+        row = self.db.execute(
+            "SELECT etag, last_modified, body, links, record, fetched_at FROM responses WHERE url = ?",
+            (canonicalize_url(url),)
+        ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, body, links, record, fetched_at = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': zlib.decompress(body).decode('utf-8') if body else '',
+            'links': json.loads(links) if links else [],
+            'record': json.loads(record) if record else None,
+            'fetched_at': fetched_at
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        """En-têtes If-None-Match / If-Modified-Since pour revalider une entrée"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, body, links=None, record=None):
+        compressed = zlib.compress(body.encode('utf-8'))
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (canonicalize_url(url), headers.get('etag'), headers.get('last-modified'),
+             compressed, len(compressed),
+             json.dumps(links or []), json.dumps(record, ensure_ascii=False) if record is not None else None,
+             now, now)
+        )
+        self.db.commit()
+
+    def iter_bodies(self):
+        """Parcourt les pages stockées : (url, corps HTML)"""
+        for url, body in self.db.execute("SELECT url, body FROM responses WHERE size > 0 ORDER BY url"):
+            yield url, zlib.decompress(body).decode('utf-8')
+
+    def touch(self, url, revalidated=True):
+        """Marque une entrée comme récemment utilisée ; `revalidated` : le serveur a répondu 304"""
+        now = time.time()
+        if revalidated:
+            self.db.execute("UPDATE responses SET last_access = ?, fetched_at = ? WHERE url = ?",
+                            (now, now, canonicalize_url(url)))
+        else:
+            self.db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, canonicalize_url(url)))
+        self.db.commit()
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de `max_bytes`"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        removed = []
+        for url, size in self.db.execute("SELECT url, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            removed.append((url,))
+            total -= size
+        self.db.executemany("DELETE FROM responses WHERE url = ?", removed)
+        self.db.commit()
+        return len(removed)
+
+    def close(self):
+        self.evict()
+        self.db.close()
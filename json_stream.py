@@ -0,0 +1,101 @@
+import json
+import os
+
+CHECKPOINT_EVERY = 20  # Nombre de pages entre deux fsync
+TOTAL_PLACEHOLDER = ' ' * 12  # Réservé pour total_pages, complété à la fermeture
+
+
+def read_jsonl(path):
+    """Enregistrements d'un fichier JSON Lines ; une dernière ligne tronquée (crash) est ignorée"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+class StreamingJsonWriter:
+    """Écrit les pages au fil de l'eau : JSON Lines + JSON final (tableau ou objet Firebase)
+
+    - `layout='array'` : `[page, page, ...]` comme documentation.json ;
+    - `layout='firebase'` : `{"metadata": {...}, "pages": {clé: page}}`, la clé
+      étant calculée par `key(page)` et `metadata['total_pages']` complété à la fin.
+
+    Le fichier .jsonl sert de journal : il est synchronisé sur disque (fsync)
+    toutes les `checkpoint_every` pages et, avec `resume=True`, les pages qu'il
+    contient sont reprises au lieu d'être re-scrapées (voir `done_urls`). Le
+    JSON final est écrit dans un fichier .partial renommé à la fermeture.
+    """
+
+    def __init__(self, path, layout='array', key=None, metadata=None, resume=False,
+                 checkpoint_every=CHECKPOINT_EVERY):
+        self.path = path
+        self.jsonl_path = os.path.splitext(path)[0] + '.jsonl'
+        self.partial_path = f"{path}.partial"
+        self.layout = layout
+        self.key = key
+        self.checkpoint_every = checkpoint_every
+        self.count = 0
+        self.done_urls = set()
+
+        previous = []
+        if resume and os.path.exists(self.jsonl_path):
+            previous = list(read_jsonl(self.jsonl_path))
+            print(f"⏯️ Reprise : {len(previous)} page(s) déjà écrites dans {self.jsonl_path}")
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.jsonl = open(self.jsonl_path, 'w', encoding='utf-8')
+        self.out = open(self.partial_path, 'w', encoding='utf-8')
+        self.total_offset = None
+
+        if layout == 'firebase':
+            metadata = dict(metadata or {})
+            metadata.pop('total_pages', None)
+            self.out.write('{\n  "metadata": {')
+            for name, value in metadata.items():
+                self.out.write(f'\n    {json.dumps(name)}: {json.dumps(value, ensure_ascii=False)},')
+            self.out.write('\n    "total_pages": ')
+            self.total_offset = self.out.tell()
+            self.out.write(TOTAL_PLACEHOLDER + '\n  },\n  "pages": {')
+        else:
+            self.out.write('[')
+
+        for record in previous:
+            self.write(record)
+        self.checkpoint()
+
+    def write(self, record):
+        self.jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        separator = ',' if self.count else ''
+        if self.layout == 'firebase':
+            body = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+            self.out.write(f'{separator}\n    {json.dumps(self.key(record))}: {body}')
+        else:
+            body = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            self.out.write(f'{separator}\n  {body}')
+
+        self.count += 1
+        if 'url' in record:
+            self.done_urls.add(record['url'])
+        if self.count % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Force l'écriture sur disque du journal et du JSON partiel"""
+        for f in (self.jsonl, self.out):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        if self.layout == 'firebase':
+            self.out.write('\n  }\n}\n')
+            self.out.seek(self.total_offset)
+            self.out.write(str(self.count).ljust(len(TOTAL_PLACEHOLDER)))
+        else:
+            self.out.write('\n]\n')
+        self.checkpoint()
+        self.jsonl.close()
+        self.out.close()
+        os.replace(self.partial_path, self.path)
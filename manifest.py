@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+VOLATILE_KEYS = ('metadata', 'scraped_at')  # Champs qui changent à chaque scraping
+SAVE_INTERVAL = 30  # Secondes entre deux sauvegardes automatiques (scrapers DOCX)
+
+
+def normalize(data):
+    """Retire les champs volatils et normalise les espaces pour le calcul d'empreinte"""
+    if isinstance(data, dict):
+        return {k: normalize(v) for k, v in data.items() if k not in VOLATILE_KEYS}
+    if isinstance(data, list):
+        return [normalize(item) for item in data]
+    if isinstance(data, str):
+        return re.sub(r'\s+', ' ', data).strip()
+    return data
+
+
+def content_hash(data):
+    """Empreinte SHA-256 du contenu normalisé d'une page"""
+    payload = json.dumps(normalize(data), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """Manifeste incrémental : URL → empreinte du contenu → artefact de sortie
+
+    Sert à ne réécrire que les pages modifiées et à supprimer les artefacts des
+    pages disparues depuis la dernière exécution. Avec `save_interval`, le
+    manifeste est aussi sauvegardé en cours d'exécution : une exécution
+    interrompue garde le nom des fichiers déjà produits.
+    """
+
+    def __init__(self, path, save_interval=None):
+        self.path = path
+        self.save_interval = save_interval
+        self.saved_at = time.monotonic()
+        self.entries = {}
+        self.seen = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def __contains__(self, url):
+        return url in self.entries
+
+    def artifact(self, url):
+        entry = self.entries.get(url)
+        return entry['artifact'] if entry else None
+
+    def is_changed(self, url, digest):
+        """Marque l'URL comme présente et indique si son contenu a changé"""
+        self.seen.add(url)
+        entry = self.entries.get(url)
+        return entry is None or entry['hash'] != digest
+
+    def keep(self, url):
+        """Marque l'URL comme présente sans modifier son entrée"""
+        self.seen.add(url)
+
+    def update(self, url, digest, artifact=None):
+        self.seen.add(url)
+        self.entries[url] = {'hash': digest, 'artifact': artifact}
+        self.autosave()
+
+    def reserve(self, url, artifact):
+        """Attribue un artefact avant sa génération ; sans empreinte, il sera régénéré tant qu'il n'a pas abouti"""
+        self.seen.add(url)
+        if url not in self.entries:
+            self.entries[url] = {'hash': None, 'artifact': artifact}
+            self.autosave()
+
+    def autosave(self):
+        if self.save_interval is not None and time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+
+    def removed(self):
+        """Entrées absentes de l'exécution courante : (url, artefact)"""
+        return [(url, entry['artifact']) for url, entry in self.entries.items() if url not in self.seen]
+
+    def prune(self):
+        """Oublie les pages disparues et retourne leurs artefacts"""
+        removed = self.removed()
+        for url, _ in removed:
+            del self.entries[url]
+        return removed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.saved_at = time.monotonic()
+
+
+def delete_removed_artifacts(manifest):
+    """Supprime les fichiers produits pour les pages disparues du site"""
+    for url, artifact in manifest.prune():
+        if artifact and os.path.exists(artifact):
+            os.remove(artifact)
+            print(f"🗑️ {artifact} supprimé ({url} n'existe plus)")
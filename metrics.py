@@ -0,0 +1,236 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration
+REPORT_DIR = "run_reports"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Bornes (secondes)
+QUANTILES = (0.5, 0.9, 0.99)
+PROMETHEUS_PREFIX = "scraper"
+METRICS_HOST = "127.0.0.1"  # Endpoint sans authentification : local par défaut
+
+
+def report_path(name):
+    """Chemin du rapport d'exécution d'un scraper"""
+    return os.path.join(REPORT_DIR, f"{name}.json")
+
+
+class Histogram:
+    """Histogramme de latences à bornes fixes : mémoire constante, même sur 100k pages"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Dernière case : au-delà de la plus grande borne
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Quantile estimé par interpolation linéaire dans la case qui le contient"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        summary = {'count': self.count, 'sum_s': round(self.sum, 4),
+                   'mean_ms': round(self.sum / self.count * 1000, 2) if self.count else 0.0}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}_ms"] = round(self.quantile(q) * 1000, 2)
+        summary['max_ms'] = round(self.max * 1000, 2)
+        return summary
+
+
+class RequestTrace:
+    """Horodatage des étapes d'une requête httpx (extension `trace`)
+
+    httpx signale le début et la fin de la connexion TCP (résolution DNS
+    comprise), du TLS, de l'envoi de la requête et de la réception des
+    en-têtes et du corps ; `phases()` en déduit les durées.
+    """
+
+    PHASES = {
+        'connect': ('connect_tcp.started', 'connect_tcp.complete'),
+        'tls': ('start_tls.started', 'start_tls.complete'),
+        'ttfb': ('send_request_headers.started', 'receive_response_headers.complete'),
+        'download': ('receive_response_body.started', 'receive_response_body.complete')
+    }
+
+    def __init__(self):
+        self.times = {}
+
+    async def __call__(self, event, info):
+        # « connection.connect_tcp.started », « http11.receive_response_headers.complete », ...
+        self.times[event.split('.', 1)[1]] = time.perf_counter()
+
+    def phases(self):
+        return {phase: self.times[end] - self.times[start] for phase, (start, end) in self.PHASES.items()
+                if start in self.times and end in self.times}
+
+
+class Metrics:
+    """Mesures d'une exécution : latences par étape et par hôte, compteurs, rapport
+
+    Les étapes (`wait`, `connect`, `tls`, `ttfb`, `download`, `fetch`, `parse`,
+    `extract`, `write`, `render`...) sont des histogrammes ; les compteurs
+    (`pages`, `bytes`, `cache_hits`, `cache_misses`, `errors`...) peuvent
+    porter un type (`kind`, ex. le code HTTP d'une erreur). Les mises à jour
+    sont protégées par un verrou : l'endpoint Prometheus les lit depuis un
+    autre thread.
+    """
+
+    def __init__(self, name='crawl'):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.histograms = {}  # (étape, hôte) -> Histogram
+        self.counters = Counter()  # (nom, hôte, type) -> valeur
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds, host=''):
+        with self.lock:
+            if (stage, host) not in self.histograms:
+                self.histograms[(stage, host)] = Histogram()
+            self.histograms[(stage, host)].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, host=''):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, host)
+
+    def count(self, name, value=1, host='', kind=''):
+        with self.lock:
+            self.counters[(name, host, kind)] += value
+
+    def total(self, name, host=None):
+        return sum(value for (counter, counter_host, _), value in self.counters.items()
+                   if counter == name and host in (None, counter_host))
+
+    def stage_summaries(self, host=None):
+        """Résumé par étape, tous hôtes confondus (`host=None`) ou pour un hôte"""
+        merged = {}
+        for (stage, stage_host), histogram in self.histograms.items():
+            if host not in (None, stage_host):
+                continue
+            total = merged.setdefault(stage, Histogram(histogram.buckets))
+            total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+            total.count += histogram.count
+            total.sum += histogram.sum
+            total.max = max(total.max, histogram.max)
+        return {stage: merged[stage].summary() for stage in sorted(merged)}
+
+    def report(self):
+        """Rapport lisible par une machine (sérialisable en JSON)"""
+        with self.lock:
+            duration = time.perf_counter() - self.started
+            hits, misses = self.total('cache_hits'), self.total('cache_misses')
+            hosts = sorted({host for _, host in self.histograms} | {host for _, host, _ in self.counters})
+            errors = Counter()
+            for (name, _, kind), value in self.counters.items():
+                if name == 'errors':
+                    errors[kind or 'unknown'] += value
+            return {
+                'name': self.name,
+                'started_at': self.started_at.isoformat(),
+                'duration_s': round(duration, 3),
+                'pages': self.total('pages'),
+                'pages_per_second': round(self.total('pages') / duration, 3) if duration else 0.0,
+                'bytes': self.total('bytes'),
+                'cache': {'hits': hits, 'misses': misses,
+                          'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None},
+                'errors': dict(errors),
+                'stages': self.stage_summaries(),
+                'hosts': {
+                    host: {'pages': self.total('pages', host), 'bytes': self.total('bytes', host),
+                           'errors': self.total('errors', host), 'stages': self.stage_summaries(host)}
+                    for host in hosts if host
+                }
+            }
+
+    def write_report(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    def prometheus(self):
+        """Export au format texte Prometheus (le nom de l'exécution devient le label `scraper`)"""
+        prefix = PROMETHEUS_PREFIX
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        with self.lock:
+            for (stage, host), histogram in sorted(self.histograms.items()):
+                labels = f'scraper="{self.name}",stage="{stage}",host="{host}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {histogram.count}")
+            for name in sorted({name for name, _, _ in self.counters}):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for (counter, host, kind), value in sorted(self.counters.items()):
+                    if counter == name:
+                        labels = f'scraper="{self.name}",host="{host}"' + (f',kind="{kind}"' if kind else '')
+                        lines.append(f"{prefix}_{name}_total{{{labels}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host=METRICS_HOST):
+        """Endpoint /metrics (Prometheus) servi dans un thread pendant l'exécution, sur `host`"""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📡 Métriques sur http://{host}:{port}/metrics")
+        return server
+
+    def print_summary(self, path=None):
+        """Écrit le rapport (si `path`) et en affiche l'essentiel"""
+        report = self.write_report(path) if path else self.report()
+        cache = report['cache']
+        ratio = f", cache {cache['hit_ratio']:.0%}" if cache['hit_ratio'] is not None else ''
+        print(f"\n📊 {report['pages']} page(s) à {report['pages_per_second']:.2f} pages/s, "
+              f"{report['bytes'] / 1024:.0f} Ko téléchargés{ratio}, {sum(report['errors'].values())} erreur(s)")
+        for stage, summary in report['stages'].items():
+            print(f"   {stage:9} ×{summary['count']:<6} p50 {summary['p50_ms']:8.1f} ms  "
+                  f"p90 {summary['p90_ms']:8.1f} ms  total {summary['sum_s']:.1f} s")
+        if path:
+            print(f"🧾 Rapport d'exécution : {path}")
+        return report
@@ -0,0 +1,94 @@
+from bs4 import BeautifulSoup, Comment, NavigableString
+
+BLOCK_SELECTOR = "h1, h2, h3, p, li, pre, code, table"
+# Éléments que `innerText` sépare du texte voisin par un saut de ligne
+LINE_TAGS = {'p', 'div', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'pre', 'table', 'tr', 'blockquote', 'section',
+             'article', 'figure', 'figcaption', 'details', 'summary', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+HIDDEN_TAGS = {'script', 'style', 'template', 'noscript'}
+
+# Sérialise tout le contenu principal en une liste de blocs en un seul aller-retour
+# avec Chromium (au lieu d'un evaluate + inner_text par élément et par cellule)
+EXTRACT_BLOCKS_JS = """
+(root, selector) => Array.from(root.querySelectorAll(selector))
+    .map(e => {
+        const block = {tag: e.tagName.toLowerCase(), text: e.innerText.trim()};
+        if (block.tag === 'table') {
+            block.rows = Array.from(e.querySelectorAll('tr')).map(
+                row => Array.from(row.querySelectorAll('td, th')).map(cell => cell.innerText)
+            );
+        }
+        return block;
+    })
+    .filter(block => block.text)
+"""
+
+
+async def extract_blocks(content):
+    """Liste des blocs (titres, paragraphes, listes, code, tableaux) du contenu principal
+
+    Chaque bloc est un dict {'tag', 'text'} ; les tableaux ont en plus une clé
+    'rows' (liste de lignes, chaque ligne étant la liste du texte des cellules).
+    """
+    return await content.evaluate(EXTRACT_BLOCKS_JS, BLOCK_SELECTOR)
+
+
+def raw_text(element):
+    """Texte d'un élément : `<br>` et éléments de bloc deviennent des sauts de ligne, le reste est collé"""
+    parts = []
+    for child in element.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            parts.append(str(child))
+        elif child.name == 'br':
+            parts.append('\n')
+        elif child.name in LINE_TAGS:
+            parts.append(f"\n{raw_text(child)}\n")
+        elif child.name not in HIDDEN_TAGS:
+            parts.append(raw_text(child))
+    return ''.join(parts)
+
+
+def element_text(element):
+    """Approximation de `innerText` : espaces préservés dans le code, normalisés ailleurs
+
+    Les balises en ligne ne créent pas d'espace (`n8n<strong>'s</strong>` → "n8n's") ;
+    les espaces sont réduits dans chaque ligne et les lignes vides retirées.
+    """
+    if element.name in ('pre', 'code'):
+        return element.get_text().strip()
+    lines = (' '.join(line.split()) for line in raw_text(element).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def blocks_from_html(html):
+    """Extraction sans navigateur : (titre, blocs) depuis le HTML servi, ou None
+
+    Produit la même liste de blocs que `extract_blocks` pour les pages MkDocs
+    Material dont le contenu est présent dans le HTML. Retourne None quand le
+    conteneur principal est absent ou vide (page rendue côté client).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    content = soup.select_one('main .md-content__inner') or soup.select_one('main article')
+    if not content:
+        return None
+
+    blocks = []
+    for element in content.select(BLOCK_SELECTOR):
+        text = element_text(element)
+        if not text:
+            continue
+
+        block = {'tag': element.name, 'text': text}
+        if element.name == 'table':
+            block['rows'] = [
+                [element_text(cell) for cell in row.select('td, th')]
+                for row in element.select('tr')
+            ]
+        blocks.append(block)
+
+    if not blocks:
+        return None
+
+    title = soup.title.get_text().strip() if soup.title else ''
+    return title.replace(" | n8n Docs", "").strip(), blocks
@@ -0,0 +1,108 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+
+import scrapper
+import scrapperV2
+import scrapperwewebJSONv2
+from crawler import extract_links, filter_links
+from http_cache import CACHE_DIR, ResponseCache
+
+# Configuration
+# Pages figées (WeWeb VitePress, n8n MkDocs Material, balisage mal formé) : urls.json associe fichier → URL
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parity_corpus')
+
+# Scrapers comparés : (nom, module) ; chacun expose scrape_page(url, soup) et extract_page(url, html)
+SCRAPERS = [
+    ('firebase', scrapper),
+    ('docx', scrapperV2),
+    ('json', scrapperwewebJSONv2)
+]
+
+
+def without_timestamps(page_data):
+    """Retire la date de scraping, seule différence attendue entre deux extractions"""
+    if page_data and 'metadata' in page_data:
+        page_data = dict(page_data, metadata={k: v for k, v in page_data['metadata'].items() if k != 'scraped_at'})
+    return page_data
+
+
+def reference_links(html, base_url):
+    """Liens détectés avec l'arbre html.parser complet (comportement historique)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return filter_links([a['href'] for a in soup.find_all('a', href=True)], base_url)
+
+
+def check_page(url, html):
+    """Liste des écarts entre le parsing de référence et le parsing rapide"""
+    base_url = '{0.scheme}://{0.netloc}'.format(urlsplit(url))
+    mismatches = []
+    if extract_links(html, base_url) != reference_links(html, base_url):
+        mismatches.append('liens')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, module in SCRAPERS:
+            expected = module.scrape_page(url, BeautifulSoup(html, 'html.parser'))
+            actual = module.extract_page(url, html)
+            if without_timestamps(expected) != without_timestamps(actual):
+                mismatches.append(name)
+    return mismatches
+
+
+def read_corpus(directory):
+    """Pages du corpus figé : (url, html)"""
+    with open(os.path.join(directory, 'urls.json'), 'r', encoding='utf-8') as f:
+        urls = json.load(f)
+    for name, url in sorted(urls.items()):
+        with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+            yield url, f.read()
+
+
+def read_cache(path):
+    """Pages stockées dans un cache HTTP : (url, html)"""
+    if not os.path.exists(path):
+        print(f"⚠️ Cache introuvable : {path}")
+        return
+    cache = ResponseCache(path)
+    try:
+        yield from cache.iter_bodies()
+    finally:
+        cache.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vérifie que le parsing rapide produit exactement la même extraction que html.parser"
+    )
+    parser.add_argument('caches', nargs='*',
+                        help="Caches HTTP ajoutés au corpus figé (défaut : tous ceux de .http_cache)")
+    parser.add_argument('--corpus', default=CORPUS_DIR, help="Dossier du corpus figé")
+    args = parser.parse_args()
+
+    sources = [read_corpus(args.corpus)]
+    sources += [read_cache(path) for path in args.caches or sorted(glob.glob(os.path.join(CACHE_DIR, '*.sqlite')))]
+
+    total = failures = 0
+    for source in sources:
+        for url, html in source:
+            total += 1
+            if mismatches := check_page(url, html):
+                failures += 1
+                print(f"❌ {url}: écart sur {', '.join(mismatches)}")
+
+    if not total:
+        print("❌ Corpus vide : aucune page comparée")
+        return 1
+    print(f"{'✅' if not failures else '❌'} {total - failures}/{total} page(s) identiques")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
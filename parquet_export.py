@@ -0,0 +1,96 @@
+import os
+from datetime import datetime
+
+# pyarrow est optionnel : seul l'export Parquet en dépend
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Configuration
+BATCH_ROWS = 10000  # Lignes accumulées par table avant écriture d'un row group
+COMPRESSION = 'zstd'
+DICTIONARY_COLUMNS = ('page_id', 'language')  # Colonnes très répétées, encodées par dictionnaire
+TIMESTAMP_COLUMNS = ('created_at', 'scraped_at')
+INTEGER_COLUMNS = ('order',)
+
+
+def parquet_path(table):
+    return f"{table}.parquet"
+
+
+def column_type(name):
+    """Type Arrow d'une colonne, déduit de son nom (chaîne par défaut)"""
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if name in TIMESTAMP_COLUMNS:
+        return pa.timestamp('us')
+    if name in INTEGER_COLUMNS:
+        return pa.int32()
+    return pa.string()
+
+
+def parse_timestamp(value):
+    """Date ISO 8601 → datetime naïf (UTC), None si vide ou illisible"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return moment.replace(tzinfo=None)
+
+
+class ParquetTables:
+    """Écrit le modèle relationnel (pages, sections, ...) en fichiers Parquet typés
+
+    Les lignes sont regroupées par lots de `batch_rows` : la mémoire reste
+    bornée quelle que soit la taille de l'export. Chaque fichier est écrit
+    dans un .tmp renommé à la fermeture.
+    """
+
+    def __init__(self, fieldnames, batch_rows=BATCH_ROWS, compression=COMPRESSION):
+        if pa is None:
+            raise RuntimeError("pyarrow n'est pas installé : pip install pyarrow")
+        self.batch_rows = batch_rows
+        self.schemas = {
+            table: pa.schema([(name, column_type(name)) for name in names])
+            for table, names in fieldnames.items()
+        }
+        self.buffers = {table: [] for table in fieldnames}
+        self.writers = {
+            table: pq.ParquetWriter(f"{parquet_path(table)}.tmp", schema, compression=compression)
+            for table, schema in self.schemas.items()
+        }
+
+    def write(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_rows:
+            self.flush(table)
+
+    def flush(self, table):
+        buffer = self.buffers[table]
+        if not buffer:
+            return
+        schema = self.schemas[table]
+        columns = {}
+        for name in schema.names:
+            values = [row.get(name) for row in buffer]
+            if name in TIMESTAMP_COLUMNS:
+                values = [parse_timestamp(value) for value in values]
+            columns[name] = values
+        self.writers[table].write_table(pa.Table.from_pydict(columns, schema=schema))
+        buffer.clear()
+
+    def close(self, discard=False):
+        """Termine les fichiers ; `discard` : abandonne l'export (erreur en cours)"""
+        for table, writer in self.writers.items():
+            if not discard:
+                self.flush(table)
+            writer.close()
+            if discard:
+                os.remove(f"{parquet_path(table)}.tmp")
+            else:
+                os.replace(f"{parquet_path(table)}.tmp", parquet_path(table))
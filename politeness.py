@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+# Configuration
+MIN_DELAY = 0.05  # Intervalle minimal visé entre deux requêtes sur un hôte (hors Crawl-delay plus long)
+MAX_DELAY = 30.0
+MAX_RETRIES = 4  # Nouveaux essais d'une URL après un 429, un 5xx ou une erreur réseau
+BACKOFF_BASE = 1.0  # Attente avant le premier nouvel essai (doublée ensuite)
+MAX_BACKOFF = 60.0
+MAX_RETRY_AFTER = 300.0  # Plafond d'un Retry-After annoncé par le serveur
+LATENCY_FACTOR = 2.0  # Latence jugée dégradée au-delà de ce multiple de la meilleure latence observée
+LATENCY_SLACK = 0.05  # ... et d'au moins cet écart (s), pour ignorer la gigue des hôtes très rapides
+MAX_ERROR_RATE = 0.05  # Taux d'erreurs au-delà duquel la concurrence n'augmente plus
+DELAY_DECREASE = 0.8  # Réduction de l'intervalle à chaque palier sain
+EWMA_ALPHA = 0.2
+WINDOW = 20  # Réponses prises en compte pour le taux d'erreurs
+
+
+def parse_retry_after(value):
+    """Durée d'attente (s) d'un en-tête Retry-After (secondes ou date HTTP), ou None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return min(max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Attente avant l'essai n° `attempt` : le Retry-After du serveur, sinon exponentielle avec gigue"""
+    if retry_after is not None:
+        return retry_after
+    ceiling = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (attempt - 1))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def is_throttling(status):
+    """Réponse qui signale un serveur saturé (None : erreur réseau)"""
+    return status is None or status == 429 or status >= 500
+
+
+def is_retryable(error):
+    """Erreur passagère : 429, 5xx, délai dépassé ou connexion impossible"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return is_throttling(error.response.status_code)
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_after_of(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return parse_retry_after(error.response.headers.get('Retry-After'))
+    return None
+
+
+async def wait_changed(condition, timeout=None):
+    """`condition.wait()` (verrou tenu) interrompu au plus tard après `timeout` secondes
+
+    Contrairement à asyncio.wait_for, l'attente reste dans la tâche courante :
+    une annulation (Ctrl+C) pendant la reprise du verrou ne le laisse pas pris
+    par une tâche orpheline. Les réveils peuvent être anticipés, l'appelant
+    revérifie sa condition.
+    """
+    if timeout is None:
+        return await condition.wait()
+
+    async def notify():
+        async with condition:
+            condition.notify_all()
+
+    loop = asyncio.get_running_loop()
+    waker = loop.call_later(timeout, lambda: loop.create_task(notify()))
+    try:
+        await condition.wait()
+    finally:
+        waker.cancel()
+
+
+class HostPolicy:
+    """Cadence adaptative d'un hôte (augmentation additive, diminution multiplicative)
+
+    La concurrence part de 1 et l'intervalle entre deux requêtes de `delay` :
+    tant que la latence reste proche de la meilleure observée et que les erreurs
+    restent rares, chaque palier (autant de réponses que de requêtes
+    simultanées permises) ajoute une requête simultanée et raccourcit
+    l'intervalle, sans descendre sous le Crawl-delay ; tant que le taux
+    d'erreurs récent dépasse MAX_ERROR_RATE, seul l'intervalle se réduit. Un 429, un 5xx ou une
+    erreur réseau divise la concurrence par deux, double l'intervalle (au plus
+    une fois par aller-retour) et suspend l'hôte pendant le Retry-After
+    annoncé, ou à défaut une attente exponentielle avec gigue.
+    """
+
+    def __init__(self, delay, crawl_delay=None, max_concurrency=8):
+        # Plancher : MIN_DELAY, ou `delay` s'il est déjà plus court (ex. miroir local), et le Crawl-delay
+        self.min_delay = max(min(delay, MIN_DELAY), crawl_delay or 0)
+        self.delay = max(delay, self.min_delay)
+        self.max_concurrency = max_concurrency
+        self.concurrency = 1
+        self.in_flight = 0
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.latency = None
+        self.best_latency = None
+        self.outcomes = []
+        self.streak = 0
+        self.failures = 0
+        self.decreased_at = 0.0
+        self.slowdowns = 0
+        self.changed = asyncio.Condition()
+
+    async def acquire(self):
+        """Attend qu'une requête soit permise (concurrence, intervalle, suspension)"""
+        async with self.changed:
+            while True:
+                now = time.monotonic()
+                wait = max(self.next_slot, self.blocked_until) - now
+                if self.in_flight < self.concurrency and wait <= 0:
+                    self.in_flight += 1
+                    self.next_slot = now + self.delay
+                    return
+                await wait_changed(self.changed, wait if wait > 0 else None)
+
+    async def release(self, latency, status=None, retry_after=None):
+        """Rend la place et ajuste la cadence d'après la réponse (`status` None : erreur réseau)"""
+        async with self.changed:
+            self.in_flight -= 1
+            throttled = is_throttling(status)
+            self.outcomes = (self.outcomes + [throttled])[-WINDOW:]
+            if throttled:
+                self.back_off(retry_after)
+            else:
+                self.speed_up(latency)
+            self.changed.notify_all()
+
+    def back_off(self, retry_after):
+        now = time.monotonic()
+        self.failures += 1
+        self.streak = 0
+        # Une seule réduction par aller-retour : les requêtes déjà parties échouent souvent ensemble
+        if now - self.decreased_at >= max(self.latency or 0, self.delay):
+            self.concurrency = max(1, self.concurrency // 2)
+            self.delay = min(MAX_DELAY, self.delay * 2)
+            self.decreased_at = now
+            self.slowdowns += 1
+        self.blocked_until = max(self.blocked_until, now + backoff_delay(self.failures, retry_after))
+
+    def speed_up(self, latency):
+        self.failures = 0
+        self.latency = latency if self.latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+        self.best_latency = latency if self.best_latency is None else min(self.best_latency, latency)
+        self.streak += 1
+        if self.streak < self.concurrency:
+            return
+        self.streak = 0
+        if self.latency > max(LATENCY_FACTOR * self.best_latency, self.best_latency + LATENCY_SLACK):
+            # Serveur qui ralentit : une requête simultanée de moins
+            self.concurrency = max(1, self.concurrency - 1)
+            return
+        self.delay = max(self.min_delay, self.delay * DELAY_DECREASE)
+        # Erreurs encore fréquentes : l'intervalle se réduit mais la concurrence reste en l'état
+        if sum(self.outcomes) / len(self.outcomes) <= MAX_ERROR_RATE:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def summary(self):
+        latency = f", latence {self.latency * 1000:.0f} ms" if self.latency is not None else ''
+        return (f"{self.concurrency} requête(s) simultanée(s), intervalle {self.delay:.2f} s"
+                f"{latency}, {self.slowdowns} ralentissement(s)")
+
+
+async def polite_get(client, policy, url, **kwargs):
+    """GET soumis à la cadence de l'hôte, réessayé sur 429 / 5xx / erreur réseau
+
+    L'attente entre deux essais est celle de la suspension de l'hôte
+    (Retry-After ou attente exponentielle) posée par `policy.release`.
+    """
+    for attempt in range(1, MAX_RETRIES + 2):
+        await policy.acquire()
+        start = time.monotonic()
+        try:
+            response = await client.get(url, **kwargs)
+        except Exception as e:
+            # Toute erreur (réseau, boucle de redirections, décodage...) rend la place de l'hôte
+            await policy.release(time.monotonic() - start)
+            if not isinstance(e, httpx.TransportError) or attempt > MAX_RETRIES:
+                raise
+            continue
+
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        await policy.release(time.monotonic() - start, response.status_code, retry_after)
+        if not is_throttling(response.status_code) or attempt > MAX_RETRIES:
+            return response
+        print(f"🔁 {url} : HTTP {response.status_code}, nouvel essai ({attempt}/{MAX_RETRIES})")
+    return response
@@ -1,11 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
-from urllib.parse import urljoin
-import time
-from collections import deque
+import os
 import re
 from datetime import datetime
+from crawl_state import CrawlState, state_path
+from crawler import add_crawl_arguments, run_pipeline, start_metrics
+from html_parser import parse_content
+from sections import split_sections
+from http_cache import ResponseCache, cache_path
+from docstore import DOCSTORE_FILE, DocStore
+from json_stream import StreamingJsonWriter
+from manifest import Manifest, content_hash
 
 # Configuration
 DEV_BASE_URL = "https://developer.weweb.io"
@@ -13,6 +18,10 @@ DOCS_BASE_URL = "https://docs.weweb.io"
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
+CRAWL_DELAY = 0.8  # Délai minimal entre deux requêtes sur un même hôte
+CONTENT_CONTAINERS = ('main',)  # Seule partie de la page parsée pour l'extraction
+OUTPUT_FILE = "weweb_firebase_ready.json"
+MANIFEST_FILE = "weweb_firebase_ready.manifest.json"
 
 def sanitize_firebase_key(key):
     """Nettoie les clés pour les rendre compatibles avec Firebase"""
@@ -22,44 +31,6 @@ def sanitize_firebase_key(key):
     # Supprime les espaces en début/fin et limite la longueur
     return key.strip()[:768]  # Limite de Firebase
 
-def get_all_urls(base_url):
-    """Explore récursivement toutes les URLs du site"""
-    visited = set()
-    queue = deque([base_url])
-    
-    while queue:
-        url = queue.popleft()
-        
-        if url in visited:
-            continue
-            
-        try:
-            print(f"🔍 Exploration de: {url}")
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            visited.add(url)
-            
-            # Détection des liens
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                if not href or href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                    continue
-                    
-                absolute_url = urljoin(base_url, href)
-                if absolute_url.startswith(base_url):
-                    clean_url = absolute_url.split('#')[0].rstrip('/')
-                    if clean_url not in visited and clean_url not in queue:
-                        queue.append(clean_url)
-            
-            time.sleep(0.8)
-            
-        except Exception as e:
-            print(f"⚠️ Erreur avec {url}: {str(e)}")
-            continue
-            
-    return sorted(visited)
-
 def process_for_firebase(data):
     """Transforme les données pour Firebase"""
     if isinstance(data, dict):
@@ -68,13 +39,10 @@ def process_for_firebase(data):
         return [process_for_firebase(item) for item in data]
     return data
 
-def scrape_page(url):
+def scrape_page(url, soup):
     """Scrape une page et retourne des données Firebase-compatibles"""
     try:
         print(f"⏳ Scraping de {url}")
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
         
         page_data = {
             'url': url,
@@ -86,56 +54,15 @@ def scrape_page(url):
             }
         }
         
-        for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5']):
-            section_id = heading.get('id')
-            if not section_id:
-                continue
-                
-            section = {
-                'title': sanitize_firebase_key(heading.get_text().strip()),
-                'content': [],
-                'code_snippets': [],
-                'images': [],
+        # Découpage en sections en un seul parcours du document
+        for section in split_sections(soup, url):
+            page_data['sections'][sanitize_firebase_key(section['id'])] = {
+                'title': sanitize_firebase_key(section['title']),
+                'content': '\n'.join(section['content']).strip(),
+                'code_snippets': section['code_snippets'],
+                'images': section['images'],
                 'tips': []
             }
-            
-            next_node = heading.next_sibling
-            while next_node and next_node.name not in ['h1', 'h2', 'h3', 'h4', 'h5']:
-                if next_node.name:
-                    # Traitement du contenu
-                    if next_node.name in ['p', 'ul', 'ol']:
-                        section['content'].append(next_node.get_text(' ', strip=True))
-                    
-                    # Images
-                    for img in next_node.find_all('img'):
-                        src = img.get('src') or img.get('data-src')
-                        if src:
-                            if not src.startswith(('http://', 'https://')):
-                                src = urljoin(url, src)
-                            if src not in section['images']:
-                                section['images'].append(src)
-                    
-                    # Code snippets
-                    for pre in next_node.find_all('pre'):
-                        code = pre.find('code')
-                        if code:
-                            lang = 'unknown'
-                            for cls in code.get('class', []):
-                                if cls.startswith('language-'):
-                                    lang = cls.replace('language-', '')
-                                    break
-                            snippet = {
-                                'code': code.get_text().strip(),
-                                'language': lang
-                            }
-                            if snippet not in section['code_snippets']:
-                                section['code_snippets'].append(snippet)
-                
-                next_node = next_node.next_sibling
-            
-            # Formatage final
-            section['content'] = '\n'.join(section['content']).strip()
-            page_data['sections'][sanitize_firebase_key(section_id)] = section
         
         return process_for_firebase(page_data)
     
@@ -143,37 +70,88 @@ def scrape_page(url):
         print(f"❌ Erreur lors du scraping de {url}: {str(e)}")
         return None
 
+def extract_page(url, html):
+    """Parse le conteneur principal de la page puis en extrait le contenu"""
+    return scrape_page(url, parse_content(html, CONTENT_CONTAINERS))
+
 def main():
+    parser = argparse.ArgumentParser(description="Scraping de la documentation WeWeb pour Firebase")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore le cache HTTP et retélécharge toutes les pages")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Conserve les pages inchangées de l'export précédent et retire les pages disparues")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprend un scraping interrompu (file d'exploration sauvegardée et journal "
+                             "weweb_firebase_ready.jsonl)")
+    parser.add_argument('--docstore', action='store_true',
+                        help=f"Alimente aussi la base plein texte {DOCSTORE_FILE}")
+    add_crawl_arguments(parser, 'weweb_firebase')
+    args = parser.parse_args()
+    cache = None if args.no_cache else ResponseCache(cache_path('weweb_firebase'))
+    store = DocStore() if args.docstore else None
+    metrics = start_metrics('weweb_firebase', args)
+
+    # Mode incrémental : les pages dont l'empreinte n'a pas changé sont reprises telles quelles
+    manifest = None
+    previous_pages = {}
+    if args.incremental:
+        manifest = Manifest(MANIFEST_FILE)
+        if os.path.exists(OUTPUT_FILE):
+            with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+                previous_pages = json.load(f)['pages']
+
     print("🚀 Début du scraping pour Firebase")
     
-    # Récupération des URLs
-    print("\n🔍 Exploration des URLs...")
-    dev_urls = get_all_urls(DEV_BASE_URL)
-    docs_urls = get_all_urls(DOCS_BASE_URL)
-    
-    # Scraping
-    print("\n⏳ Extraction du contenu...")
-    firebase_data = {
-        'metadata': {
-            'created_at': datetime.utcnow().isoformat(),
-            'total_pages': len(dev_urls) + len(docs_urls)
-        },
-        'pages': {}
-    }
-    
-    for i, url in enumerate(dev_urls + docs_urls, 1):
-        if page_data := scrape_page(url):
-            page_key = sanitize_firebase_key(page_data['url'])
-            firebase_data['pages'][page_key] = page_data
-        print(f"📊 Progression: {i}/{len(dev_urls)+len(docs_urls)}", end='\r')
-        time.sleep(1)
-    
-    # Sauvegarde
-    output_file = "weweb_firebase_ready.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(firebase_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✅ Fichier prêt pour Firebase: {output_file}")
+    # Les pages sont écrites au fil de l'eau (JSON Lines + JSON Firebase), avec reprise possible
+    writer = StreamingJsonWriter(
+        OUTPUT_FILE, layout='firebase',
+        key=lambda page_data: sanitize_firebase_key(page_data['url']),
+        metadata={'created_at': datetime.utcnow().isoformat()},
+        resume=args.resume
+    )
+    if manifest:
+        for url in writer.done_urls:
+            manifest.keep(url)
+    state = CrawlState(state_path('weweb_firebase'), resume=args.resume, on_checkpoint=writer.checkpoint)
+
+    # Exploration et extraction en une seule passe
+    print("\n🔍 Exploration et extraction du contenu...")
+
+    def write_page(page_data):
+        page_key = sanitize_firebase_key(page_data['url'])
+        if manifest:
+            digest = content_hash(page_data)
+            if manifest.is_changed(page_data['url'], digest) or page_key not in previous_pages:
+                manifest.update(page_data['url'], digest, page_key)
+            else:
+                page_data = previous_pages[page_key]
+        writer.write(page_data)
+        if store:
+            store.upsert_page(page_data)
+        print(f"📊 Pages extraites: {writer.count}", end='\r')
+
+    run_pipeline(DEV_BASE_URL, DOCS_BASE_URL, headers=HEADERS, delay=CRAWL_DELAY,
+                 extract=extract_page, write=write_page, max_concurrency=args.concurrency, cache=cache,
+                 skip=writer.done_urls, metrics=metrics, state=state,
+                 on_discover=manifest.keep if manifest else None)
+    if manifest:
+        # Page encore liée mais non réécrite (échec, extraction vide) : son enregistrement précédent est conservé
+        for url in sorted(manifest.seen - writer.done_urls):
+            page_key = manifest.artifact(url)
+            if page_key in previous_pages:
+                writer.write(previous_pages[page_key])
+    writer.close()
+    if store:
+        store.optimize()
+        store.close()
+
+    if manifest:
+        for url, _ in manifest.prune():
+            print(f"🗑️ Page disparue retirée: {url}")
+        manifest.save()
+
+    metrics.print_summary(args.report)
+    print(f"\n✅ Fichier prêt pour Firebase: {OUTPUT_FILE}")
     print("💡 Importez-le via: Firebase Console → Realtime Database → ⏷ → Importer JSON")
 
 if __name__ == "__main__":
@@ -1,15 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import argparse
 import time
-from collections import deque
-import re
 from datetime import datetime, timezone
 import os
-from docx import Document
 from docx.shared import Pt
-from docx.oxml.shared import qn, OxmlElement
 from docx.enum.text import WD_COLOR_INDEX
+from crawler import add_crawl_arguments, run_pipeline, start_metrics
+from docx_render import RENDER_WORKERS, RenderPool
+from docx_writer import NameRegistry, add_hyperlink, add_table, new_document, sanitize_filename
+from html_parser import parse_content
+from sections import split_sections
+from http_cache import ResponseCache, cache_path
+from manifest import SAVE_INTERVAL, Manifest, content_hash, delete_removed_artifacts
 
 # Configuration
 DEV_BASE_URL = "https://developer.weweb.io"
@@ -18,96 +19,24 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 OUTPUT_DIR = "weweb_docs"
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, ".manifest.json")
 REQUEST_DELAY = 1.2  # Délai entre les requêtes
+CONTENT_CONTAINERS = ('main',)  # Seule partie de la page parsée pour l'extraction
 
-def sanitize_filename(filename):
-    filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
-    return filename[:50].strip()
-
-def add_hyperlink(paragraph, url, text):
-    """Ajoute un lien cliquable dans un paragraphe Word."""
-    part = paragraph.part
-    r_id = part.relate_to(url, "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink", is_external=True)
-
-    hyperlink = OxmlElement('w:hyperlink')
-    hyperlink.set(qn('r:id'), r_id)
-
-    run = OxmlElement('w:r')
-    rPr = OxmlElement('w:rPr')
-
-    color = OxmlElement('w:color')
-    color.set(qn('w:val'), '0000EE')
-    rPr.append(color)
-
-    underline = OxmlElement('w:u')
-    underline.set(qn('w:val'), 'single')
-    rPr.append(underline)
-
-    run.append(rPr)
-
-    text_elem = OxmlElement('w:t')
-    text_elem.text = text
-    run.append(text_elem)
-
-    hyperlink.append(run)
-    paragraph._p.append(hyperlink)
-
-def get_all_urls(base_url):
-    visited = set()
-    queue = deque([base_url])
-
-    while queue:
-        url = queue.popleft()
-        if url in visited:
-            continue
-
-        try:
-            print(f"🔍 Exploration de: {url}")
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            visited.add(url)
-
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                if not href or href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                    continue
-
-                absolute_url = urljoin(base_url, href)
-                if absolute_url.startswith(base_url):
-                    clean_url = absolute_url.split('#')[0].rstrip('/')
-                    if clean_url not in visited and clean_url not in queue:
-                        queue.append(clean_url)
-
-            time.sleep(REQUEST_DELAY)
-
-        except Exception as e:
-            print(f"⚠️ Erreur avec {url}: {str(e)}")
-            continue
-
-    return sorted(visited)
-
-def create_docx(page_data, output_dir):
+def create_docx(page_data, output_path):
+    """Génère le DOCX d'une page dans `output_path` (nom réservé par l'appelant, voir NameRegistry)"""
     try:
-        doc = Document()
-
-        # Style de base
-        style = doc.styles['Normal']
-        style.font.name = 'Calibri'
-        style.font.size = Pt(11)
+        # Modèle déjà stylé (Calibri 11) chargé depuis la mémoire
+        doc = new_document()
 
         doc.add_heading(page_data['title'], 0)
 
-        # Table des métadonnées
-        meta_table = doc.add_table(rows=2, cols=2)
-        meta_table.style = 'LightShading-Accent1'
-
-        meta_table.cell(0, 0).text = "URL source"
+        # Table des métadonnées, remplie d'un coup ; le lien est ajouté ensuite
+        meta_table = add_table(doc, [["URL source", ""],
+                                     ["Date de scraping", page_data['metadata']['scraped_at']]],
+                               style='LightShading-Accent1')
         add_hyperlink(meta_table.cell(0, 1).paragraphs[0], page_data['url'], page_data['url'])
 
-        meta_table.cell(1, 0).text = "Date de scraping"
-        meta_table.cell(1, 1).text = page_data['metadata']['scraped_at']
-
         for section_id, section in page_data['sections'].items():
             doc.add_heading(section['title'], level=2)
 
@@ -130,27 +59,17 @@ def create_docx(page_data, output_dir):
                     p = doc.add_paragraph()
                     add_hyperlink(p, img_url, img_url)
 
-        filename = f"{sanitize_filename(page_data['title'])}.docx"
-        output_path = os.path.join(output_dir, filename)
-
-        counter = 1
-        while os.path.exists(output_path):
-            output_path = os.path.join(output_dir, f"{sanitize_filename(page_data['title'])}_{counter}.docx")
-            counter += 1
-
         doc.save(output_path)
         print(f"✅ Fichier créé: {os.path.basename(output_path)}")
+        return output_path
 
     except Exception as e:
         print(f"❌ Erreur DOCX: {str(e)}")
         raise
 
-def scrape_page(url):
+def scrape_page(url, soup):
     try:
         print(f"⏳ Scraping de {url}")
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
 
         page_data = {
             'url': url,
@@ -162,71 +81,81 @@ def scrape_page(url):
             }
         }
 
-        for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5']):
-            section_id = heading.get('id')
-            if not section_id:
-                continue
-
-            section = {
-                'title': heading.get_text().strip(),
-                'content': [],
-                'code_snippets': [],
-                'images': []
+        # Découpage en sections en un seul parcours du document
+        for section in split_sections(soup, url, dedupe_snippets=False):
+            page_data['sections'][section['id']] = {
+                'title': section['title'],
+                'content': '\n'.join(section['content']).strip(),
+                'code_snippets': section['code_snippets'],
+                'images': section['images']
             }
 
-            next_node = heading.find_next_sibling()
-            while next_node and next_node.name not in ['h1', 'h2', 'h3', 'h4', 'h5']:
-                if next_node.name:
-                    if next_node.name in ['p', 'ul', 'ol']:
-                        section['content'].append(next_node.get_text(' ', strip=True))
-
-                    for img in next_node.find_all('img'):
-                        src = img.get('src') or img.get('data-src')
-                        if src:
-                            if not src.startswith(('http://', 'https://')):
-                                src = urljoin(url, src)
-                            if src not in section['images']:
-                                section['images'].append(src)
-
-                    for pre in next_node.find_all('pre'):
-                        code = pre.find('code')
-                        if code:
-                            lang_classes = [cls for cls in code.get('class', []) if cls.startswith('language-')]
-                            lang = lang_classes[0].replace('language-', '') if lang_classes else 'unknown'
-                            section['code_snippets'].append({
-                                'code': code.get_text().strip(),
-                                'language': lang
-                            })
-
-                next_node = next_node.find_next_sibling()
-
-            section['content'] = '\n'.join(section['content']).strip()
-            page_data['sections'][section_id] = section
-
         return page_data
 
     except Exception as e:
         print(f"❌ Erreur de scraping: {str(e)}")
         return None
 
+def extract_page(url, html):
+    """Parse le conteneur principal de la page puis en extrait le contenu"""
+    return scrape_page(url, parse_content(html, CONTENT_CONTAINERS))
+
 def main():
+    parser = argparse.ArgumentParser(description="Scraping de la documentation WeWeb en fichiers DOCX")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore le cache HTTP et retélécharge toutes les pages")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne régénère que les DOCX des pages modifiées et supprime ceux des pages disparues")
+    parser.add_argument('--render-workers', type=int, default=RENDER_WORKERS,
+                        help="Processus de génération DOCX")
+    add_crawl_arguments(parser, 'weweb_docx')
+    args = parser.parse_args()
+    cache = None if args.no_cache else ResponseCache(cache_path('weweb_docx'))
+    manifest = Manifest(MANIFEST_FILE, save_interval=SAVE_INTERVAL) if args.incremental else None
+    metrics = start_metrics('weweb_docx', args)
+
     print("🚀 Démarrage du scraping WeWeb")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    print("\n🔍 Exploration des sites...")
-    dev_urls = get_all_urls(DEV_BASE_URL)
-    docs_urls = get_all_urls(DOCS_BASE_URL)
-
-    total = len(dev_urls) + len(docs_urls)
+    print("\n🔍 Exploration et extraction des sites...")
     start_time = time.time()
 
-    for idx, url in enumerate(dev_urls + docs_urls, 1):
-        print(f"\n📄 Traitement {idx}/{total}: {url}")
-        page_data = scrape_page(url)
-        if page_data:
-            create_docx(page_data, OUTPUT_DIR)
-        time.sleep(REQUEST_DELAY)
-
+    # Les DOCX sont générés dans un pool de processus ; le nom de fichier est réservé ici
+    pool = RenderPool(args.render_workers, metrics=metrics)
+    registry = NameRegistry(OUTPUT_DIR)
+
+    async def write_page(page_data):
+        url = page_data['url']
+        artifact = None
+        if manifest:
+            digest = content_hash(page_data)
+            artifact = manifest.artifact(url)
+            if not manifest.is_changed(url, digest) and artifact and os.path.exists(artifact):
+                return
+
+        output_path = artifact or registry.reserve(sanitize_filename(page_data['title']))
+        if manifest:
+            manifest.reserve(url, output_path)
+        # Le manifeste n'enregistre la nouvelle empreinte qu'une fois le DOCX écrit
+        await pool.submit(create_docx, page_data, output_path, label=url,
+                          on_success=(lambda: manifest.update(url, digest, output_path)) if manifest else None)
+
+    # Toute URL découverte est gardée au manifeste : seules les pages introuvables voient leur DOCX supprimé
+    try:
+        run_pipeline(DEV_BASE_URL, DOCS_BASE_URL, headers=HEADERS, delay=REQUEST_DELAY,
+                     extract=extract_page, write=write_page, max_concurrency=args.concurrency, cache=cache,
+                     metrics=metrics, on_discover=manifest.keep if manifest else None)
+    finally:
+        pool.close()
+        if manifest:
+            # Même interrompue, l'exécution suivante réécrit les DOCX produits au lieu de les dupliquer
+            manifest.save()
+
+    if manifest:
+        delete_removed_artifacts(manifest)
+        manifest.save()
+
+    metrics.print_summary(args.report)
     print(f"\n✅ Terminé en {time.time() - start_time:.2f} secondes")
     print(f"📂 Dossier de sortie: {os.path.abspath(OUTPUT_DIR)}")
 
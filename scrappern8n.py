@@ -1,34 +1,235 @@
+import argparse
 import asyncio
 from playwright.async_api import async_playwright
-from docx import Document
 from docx.shared import Pt
-from docx.oxml.ns import qn
 import os
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from browser_pool import POOL_SIZE, new_light_page, run_page_pool
+from docx_render import RENDER_WORKERS, RenderPool
+from docx_writer import add_table, new_document
+from http_cache import ResponseCache, cache_path
+from frontier import canonicalize_url
+from sitemap import discover_urls, fetch_robots
+from politeness import HostPolicy, polite_get
+from transport import make_client
+from n8n_blocks import blocks_from_html, extract_blocks
+from manifest import SAVE_INTERVAL, Manifest, content_hash, delete_removed_artifacts
 
 BASE_URL = "https://docs.n8n.io"
 OUTPUT_DIR = "n8n_docs_clean"
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, ".manifest.json")
+# Backend d'extraction par site : "static" lit le HTML servi (MkDocs Material),
+# "playwright" rend chaque page dans Chromium
+SITE_BACKENDS = {
+    "https://docs.n8n.io": "static"
+}
+BACKEND = SITE_BACKENDS.get(BASE_URL, "playwright")
+REQUEST_DELAY = 0.5  # Intervalle de départ entre deux requêtes, ajusté ensuite selon les réponses du serveur
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-async def scrape_and_format_docs():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(BASE_URL)
+def cached_entry(cache, link):
+    """Entrée de cache d'une page déjà convertie dont le fichier existe encore"""
+    entry = cache.get(link) if cache else None
+    if not entry or not entry['record'] or not os.path.exists(entry['record']['file']):
+        return None
+    return entry
 
-        await page.wait_for_selector("nav a")
+async def is_unchanged(client, cache, link, lastmod=None, policy=None):
+    """True si la page déjà convertie n'a pas changé (sitemap <lastmod> ou réponse 304)"""
+    entry = cached_entry(cache, link)
+    if not entry:
+        return False
+    if lastmod and entry['fetched_at'] >= lastmod:
+        cache.touch(link, revalidated=False)
+        return True
+
+    headers = ResponseCache.conditional_headers(entry)
+    if policy:
+        response = await polite_get(client, policy, link, headers=headers)
+    else:
+        response = await client.get(link, headers=headers)
+    if response.status_code != 304:
+        return False
+    cache.touch(link)
+    return True
+
+def build_docx(title, blocks):
+    """Construit le document Word d'une page à partir de ses blocs"""
+    doc = new_document()
+    doc.add_heading(title, level=0)
+
+    for block in blocks:
+        tag, text = block['tag'], block['text']
+
+        # Gestion des titres
+        if tag in ["h1", "h2", "h3"]:
+            level = int(tag[1])
+            doc.add_heading(text, level=level)
+
+        # Gestion des paragraphes
+        elif tag == "p":
+            doc.add_paragraph(text)
+
+        # Gestion des listes
+        elif tag == "li":
+            doc.add_paragraph(f"• {text}")
+
+        # Gestion du code
+        elif tag in ["pre", "code"]:
+            para = doc.add_paragraph()
+            run = para.add_run(text)
+            run.font.name = "Courier New"
+            run.font.size = Pt(9)
+
+        # Gestion des tableaux : dimensions connues d'avance, tableau créé d'un coup
+        elif tag == "table":
+            add_table(doc, block['rows'])
 
-        # Récupère tous les liens internes du menu
+    return doc
+
+def render_docx(title, blocks, filename):
+    """Construit et enregistre un DOCX (exécuté dans le pool de rendu)"""
+    build_docx(title, blocks).save(filename)
+    print(f"✅ {filename} sauvegardé")
+    return filename
+
+def docx_filename(number, title):
+    return f"{OUTPUT_DIR}/{number+1:03d}_{title[:50].replace(' ', '_').replace('/', '-')}.docx"
+
+async def discover_links(client, browser, robots=None):
+    """Liens internes du menu et du sitemap, avec le <lastmod> de chaque page s'il est connu
+
+    Le menu est lu dans le HTML brut en mode statique, dans le DOM rendu sinon.
+    """
+    if browser is None:
+        response = await client.get(BASE_URL)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        links = [urljoin(str(response.url), a['href']) for a in soup.select("nav a[href]")]
+    else:
+        page = await new_light_page(browser)
+        await page.goto(BASE_URL)
+        await page.wait_for_selector("nav a")
         links = await page.eval_on_selector_all("nav a", "elements => elements.map(e => e.href)")
-        links = list(set([link for link in links if link.startswith(BASE_URL)]))
+        await page.context.close()
+
+    links = {canonicalize_url(link): link.split('#')[0] for link in links if link.startswith(BASE_URL)}
+    lastmods = {}
+    for link, lastmod in await discover_urls(client, BASE_URL, robots):
+        links.setdefault(canonicalize_url(link), link)
+        lastmods[links[canonicalize_url(link)]] = lastmod
+
+    # Tri pour garder une numérotation des fichiers stable d'une exécution à l'autre
+    return sorted(links.values()), lastmods
+
+async def scrape_and_format_docs(use_cache=True, incremental=False, pool_size=POOL_SIZE, backend=BACKEND,
+                                 render_workers=RENDER_WORKERS):
+    cache = ResponseCache(cache_path('n8n_docx')) if use_cache else None
+    manifest = Manifest(MANIFEST_FILE, save_interval=SAVE_INTERVAL) if incremental else None
+    # Les DOCX sont générés dans un pool de processus, sans bloquer les téléchargements
+    renderer = RenderPool(render_workers)
+    try:
+        async with async_playwright() as p, make_client(max_connections=pool_size) as client:
+            # Chromium n'est lancé que si le rendu JavaScript est nécessaire
+            browser = None if backend == 'static' else await p.chromium.launch(headless=True)
 
-        print(f"🔗 {len(links)} liens trouvés dans le menu")
+            # Cadence adaptative : démarre à REQUEST_DELAY, jamais sous le Crawl-delay de robots.txt
+            robots = await fetch_robots(client, BASE_URL)
+            policy = HostPolicy(REQUEST_DELAY, robots['crawl_delay'], max_concurrency=pool_size)
+            links, lastmods = await discover_links(client, browser, robots)
+            numbers = {link: idx for idx, link in enumerate(links)}
 
-        for idx, link in enumerate(links):
-            try:
-                await page.goto(link)
+            print(f"🔗 {len(links)} liens trouvés dans le menu")
+            if manifest:
+                # Une page du menu en échec n'a pas disparu : son DOCX est conservé
+                for link in links:
+                    manifest.keep(link)
+
+            async def save_page(link, title, blocks, headers, body):
+                # Mode incrémental : le DOCX n'est régénéré que si le contenu a changé
+                filename = docx_filename(numbers[link], title)
+                unchanged = False
+                digest = None
+                if manifest:
+                    digest = content_hash({'title': title, 'blocks': blocks})
+                    artifact = manifest.artifact(link)
+                    unchanged = not manifest.is_changed(link, digest) and artifact and os.path.exists(artifact)
+                    filename = artifact or filename
+                    manifest.reserve(link, filename)
+
+                def record():
+                    # Manifeste et cache ne référencent le fichier qu'une fois le DOCX écrit
+                    if manifest:
+                        manifest.update(link, digest, filename)
+                    if cache:
+                        cache.store(link, headers, body, record={'file': filename})
+
+                if unchanged:
+                    print(f"♻️ {filename} inchangé")
+                    record()
+                else:
+                    await renderer.submit(render_docx, title, blocks, filename, label=link, on_success=record)
+
+            def skip_unchanged(link):
+                if manifest:
+                    manifest.keep(link)
+                print(f"♻️ {link} inchangé, conversion ignorée")
+
+            failed = []
+
+            async def convert_static(link, semaphore):
+                """Conversion depuis le HTML servi ; False si la page doit passer par Playwright
+
+                Seul un contenu absent du HTML (rendu côté client) envoie la page à
+                Chromium : une erreur HTTP ou réseau est une page en échec.
+                """
+                async with semaphore:
+                    try:
+                        entry = cached_entry(cache, link)
+                        if entry and lastmods.get(link) and entry['fetched_at'] >= lastmods[link]:
+                            cache.touch(link, revalidated=False)
+                            skip_unchanged(link)
+                            return True
+
+                        response = await polite_get(client, policy, link,
+                                                    headers=ResponseCache.conditional_headers(entry))
+                        if response.status_code == 304 and entry:
+                            cache.touch(link)
+                            skip_unchanged(link)
+                            return True
+
+                        response.raise_for_status()
+                    except Exception as e:
+                        print(f"❌ Erreur sur {link}: {str(e)}")
+                        failed.append(link)
+                        return True
+
+                    try:
+                        extracted = blocks_from_html(response.text)
+                    except Exception as e:
+                        print(f"⚠️ Extraction statique impossible pour {link}: {str(e)}")
+                        return False
+
+                    if not extracted:
+                        return False
+                    try:
+                        title, blocks = extracted
+                        await save_page(link, title, blocks, response.headers, response.text)
+                    except Exception as e:
+                        print(f"❌ Erreur sur {link}: {str(e)}")
+                        failed.append(link)
+                    return True
+
+            async def convert_page(page, link):
+                if cache and await is_unchanged(client, cache, link, lastmods.get(link), policy):
+                    skip_unchanged(link)
+                    return
+
+                response = await page.goto(link)
                 await page.wait_for_selector("main")
-                
+
                 # Sélection du conteneur de contenu principal (à adapter si nécessaire)
                 content = await page.query_selector('main .md-content__inner')
                 if not content:
@@ -37,66 +238,55 @@ async def scrape_and_format_docs():
                 title = await page.title()
                 title = title.replace(" | n8n Docs", "").strip()
 
-                doc = Document()
-                doc.add_heading(title, level=0)
-
-                if content:
-                    # Sélection des éléments uniquement dans le contenu principal
-                    elements = await content.query_selector_all("h1, h2, h3, p, li, pre, code, table")
-                    
-                    for el in elements:
-                        tag = await el.evaluate("e => e.tagName.toLowerCase()")
-                        text = (await el.inner_text()).strip()
-
-                        if not text:
-                            continue
-
-                        # Gestion des titres
-                        if tag in ["h1", "h2", "h3"]:
-                            level = int(tag[1])
-                            doc.add_heading(text, level=level)
-                        
-                        # Gestion des paragraphes
-                        elif tag == "p":
-                            doc.add_paragraph(text)
-                        
-                        # Gestion des listes
-                        elif tag == "li":
-                            doc.add_paragraph(f"• {text}")
-                        
-                        # Gestion du code
-                        elif tag in ["pre", "code"]:
-                            para = doc.add_paragraph()
-                            run = para.add_run(text)
-                            run.font.name = "Courier New"
-                            run.font.size = Pt(9)
-                        
-                        # Gestion des tableaux
-                        elif tag == "table":
-                            rows = await el.query_selector_all("tr")
-                            table = doc.add_table(rows=1, cols=1)
-                            
-                            for row in rows:
-                                cells = await row.query_selector_all("td, th")
-                                row_data = [await cell.inner_text() for cell in cells]
-                                
-                                if not table.rows:
-                                    table.add_row()
-                                row_cells = table.rows[-1].cells
-                                
-                                for i, data in enumerate(row_data):
-                                    if i >= len(row_cells):
-                                        table.add_column()
-                                        row_cells = table.rows[-1].cells
-                                    row_cells[i].text = data
-
-                filename = f"{OUTPUT_DIR}/{idx+1:03d}_{title[:50].replace(' ', '_').replace('/', '-')}.docx"
-                doc.save(filename)
-                print(f"✅ {filename} sauvegardé")
-
-            except Exception as e:
-                print(f"❌ Erreur sur {link}: {str(e)}")
-
-        await browser.close()
-
-asyncio.run(scrape_and_format_docs())
\ No newline at end of file
+                blocks = await extract_blocks(content) if content else []
+                if response:
+                    await save_page(link, title, blocks, response.headers, await response.text())
+                else:
+                    await save_page(link, title, blocks, {}, '')
+
+            pending = links
+            if backend == 'static':
+                semaphore = asyncio.Semaphore(pool_size)
+                done = await asyncio.gather(*[convert_static(link, semaphore) for link in links])
+                pending = [link for link, ok in zip(links, done) if not ok]
+                if pending:
+                    print(f"🧭 {len(pending)} page(s) nécessitent JavaScript, rendu via Playwright")
+                    browser = await p.chromium.launch(headless=True)
+
+            # Les pages restantes sont rendues en parallèle par un pool d'onglets
+            if pending:
+                failed += await run_page_pool(browser, pending, convert_page, pool_size=pool_size)
+
+            if browser:
+                await browser.close()
+        print(f"🚦 {BASE_URL} : {policy.summary()}")
+        if failed:
+            print(f"❌ {len(failed)} page(s) en échec : {', '.join(failed)}")
+    finally:
+        renderer.close()
+        if manifest:
+            # Même interrompue, l'exécution suivante retrouve les DOCX déjà produits
+            manifest.save()
+        if cache:
+            cache.close()
+
+    if manifest:
+        delete_removed_artifacts(manifest)
+        manifest.save()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraping de la documentation n8n en fichiers DOCX")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore le cache HTTP et reconvertit toutes les pages")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne régénère que les DOCX des pages modifiées et supprime ceux des pages disparues")
+    parser.add_argument('--workers', type=int, default=POOL_SIZE,
+                        help="Nombre de pages traitées en parallèle")
+    parser.add_argument('--backend', choices=['static', 'playwright'], default=BACKEND,
+                        help="static : HTML servi, Playwright en secours ; playwright : rendu Chromium systématique")
+    parser.add_argument('--render-workers', type=int, default=RENDER_WORKERS,
+                        help="Processus de génération DOCX")
+    args = parser.parse_args()
+    asyncio.run(scrape_and_format_docs(use_cache=not args.no_cache, incremental=args.incremental,
+                                       pool_size=args.workers, backend=args.backend,
+                                       render_workers=args.render_workers))
\ No newline at end of file
@@ -1,7 +1,14 @@
+import argparse
 import asyncio
-import json
 from playwright.async_api import async_playwright
 import os
+from browser_pool import POOL_SIZE, new_light_page, run_page_pool
+from crawl_state import DONE, FAILED, CrawlState, state_path
+from docstore import DOCSTORE_FILE, DocStore
+from frontier import canonicalize_url
+from json_stream import StreamingJsonWriter
+from sitemap import discover_urls
+from transport import make_client
 
 BASE_URL = "https://docs.n8n.io"
 OUTPUT_DIR = "n8n_docs_simple"
@@ -9,55 +16,98 @@ JSON_FILE = "documentation.json"
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-async def scrape_and_format_docs():
-    async with async_playwright() as p:
+async def discover_links(client, browser):
+    """Liens du menu (rendu Chromium) complétés par le sitemap"""
+    page = await new_light_page(browser)
+    await page.goto(BASE_URL)
+
+    await page.wait_for_selector("nav a")
+
+    links = await page.eval_on_selector_all("nav a", "elements => elements.map(e => e.href)")
+    links = list(set([link for link in links if link.startswith(BASE_URL)]))
+    await page.context.close()
+
+    # Complète le menu avec les pages annoncées par le sitemap
+    known = {canonicalize_url(link) for link in links}
+    links += [link for link, _ in await discover_urls(client, BASE_URL) if canonicalize_url(link) not in known]
+    return links
+
+async def scrape_and_format_docs(pool_size=POOL_SIZE, resume=False, store=None):
+    # Les pages sont écrites au fil de l'eau (JSON + journal .jsonl pour la reprise)
+    output_path = os.path.join(OUTPUT_DIR, JSON_FILE)
+    writer = StreamingJsonWriter(output_path, layout='array', resume=resume)
+    # Liste des liens et statut de chacun sauvegardés régulièrement, après le journal
+    state = CrawlState(state_path('n8n_json'), resume=resume, on_checkpoint=writer.checkpoint)
+
+    async with async_playwright() as p, make_client(max_connections=pool_size) as client:
         browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(BASE_URL)
-
-        await page.wait_for_selector("nav a")
-
-        links = await page.eval_on_selector_all("nav a", "elements => elements.map(e => e.href)")
-        links = list(set([link for link in links if link.startswith(BASE_URL)]))
-
-        print(f"🔗 {len(links)} liens trouvés dans le menu")
-
-        documentation = []
-
-        for link in links:
-            try:
-                await page.goto(link)
-                await page.wait_for_selector("main")
-                
-                content = await page.query_selector('main .md-content__inner') or await page.query_selector('main article')
-                
-                # Extraction du titre h1
-                h1_element = await content.query_selector('h1')
-                title = await h1_element.inner_text() if h1_element else "Sans titre"
-                title = title.strip()
-                
-                # Extraction de tout le texte brut
-                full_text = await content.inner_text() if content else ""
-                full_text = " ".join(full_text.split()).strip()  # Nettoyage des espaces
-
-                documentation.append({
-                    "h1": title,
-                    "url": link,
-                    "content": full_text
-                })
-
-                print(f"✅ {title[:50]}... traité")
-
-            except Exception as e:
-                print(f"❌ Erreur sur {link}: {str(e)}")
-
-        # Sauvegarde du JSON
-        output_path = os.path.join(OUTPUT_DIR, JSON_FILE)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(documentation, f, ensure_ascii=False, indent=2)
-            
+
+        # En reprise, la liste des liens sauvegardée évite une nouvelle découverte
+        if not state.count(BASE_URL):
+            for link in await discover_links(client, browser):
+                state.add(BASE_URL, link)
+            state.checkpoint()
+        print(f"🔗 {state.count(BASE_URL)} liens trouvés dans le menu")
+
+        links = []
+        for _, link, _ in state.queued(BASE_URL):
+            if link in writer.done_urls:
+                state.mark(BASE_URL, link, DONE)
+            else:
+                links.append(link)
+
+        async def extract_page(page, link):
+            await page.goto(link)
+            await page.wait_for_selector("main")
+
+            content = await page.query_selector('main .md-content__inner') or await page.query_selector('main article')
+
+            # Extraction du titre h1
+            h1_element = await content.query_selector('h1')
+            title = await h1_element.inner_text() if h1_element else "Sans titre"
+            title = title.strip()
+
+            # Extraction de tout le texte brut
+            full_text = await content.inner_text() if content else ""
+            full_text = " ".join(full_text.split()).strip()  # Nettoyage des espaces
+
+            record = {
+                "h1": title,
+                "url": link,
+                "content": full_text
+            }
+            if link not in writer.done_urls:
+                # Un nouvel essai après une erreur survenue plus loin n'écrit pas la page deux fois
+                writer.write(record)
+            state.mark(BASE_URL, link, DONE)
+            if store:
+                store.upsert_page(record)
+
+            print(f"✅ {title[:50]}... traité")
+
+        # Les pages sont rendues en parallèle par un pool d'onglets
+        try:
+            for link in await run_page_pool(browser, links, extract_page, pool_size=pool_size):
+                state.mark(BASE_URL, link, FAILED)
+        finally:
+            state.close()
+        writer.close()
+
         print(f"\n🎉 Fichier JSON généré : {output_path}")
 
         await browser.close()
 
-asyncio.run(scrape_and_format_docs())
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraping de la documentation n8n en JSON")
+    parser.add_argument('--workers', type=int, default=POOL_SIZE,
+                        help="Nombre d'onglets Chromium utilisés en parallèle")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprend un scraping interrompu à partir du journal JSON Lines")
+    parser.add_argument('--docstore', action='store_true',
+                        help=f"Alimente aussi la base plein texte {DOCSTORE_FILE}")
+    args = parser.parse_args()
+    store = DocStore() if args.docstore else None
+    asyncio.run(scrape_and_format_docs(pool_size=args.workers, resume=args.resume, store=store))
+    if store:
+        store.optimize()
+        store.close()
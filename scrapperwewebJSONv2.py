@@ -1,11 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import argparse
 import time
-from collections import deque
 import re
-import json
 import os
+from crawl_state import CrawlState, state_path
+from crawler import add_crawl_arguments, run_pipeline, start_metrics
+from html_parser import parse_content
+from http_cache import ResponseCache, cache_path
+from json_stream import StreamingJsonWriter
 
 # Configuration
 DEV_BASE_URL = "https://developer.weweb.io"
@@ -16,51 +17,14 @@ HEADERS = {
 OUTPUT_DIR = "weweb_docs_json"
 JSON_FILE = "documentation.json"
 REQUEST_DELAY = 1.2  # Délai entre les requêtes
+CONTENT_CONTAINERS = ('main', 'article')  # Seule partie de la page parsée pour l'extraction
 
 def sanitize_text(text):
     return re.sub(r'\s+', ' ', text).strip()
 
-def get_all_urls(base_url):
-    visited = set()
-    queue = deque([base_url])
-
-    while queue:
-        url = queue.popleft()
-        if url in visited:
-            continue
-
-        try:
-            print(f"🔍 Exploration de: {url}")
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            visited.add(url)
-
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                if not href or href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                    continue
-
-                absolute_url = urljoin(base_url, href)
-                if absolute_url.startswith(base_url):
-                    clean_url = absolute_url.split('#')[0].rstrip('/')
-                    if clean_url not in visited and clean_url not in queue:
-                        queue.append(clean_url)
-
-            time.sleep(REQUEST_DELAY)
-
-        except Exception as e:
-            print(f"⚠️ Erreur avec {url}: {str(e)}")
-            continue
-
-    return sorted(visited)
-
-def scrape_page(url):
+def scrape_page(url, soup):
     try:
         print(f"⏳ Scraping de {url}")
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
 
         # Extraction du titre h1
         h1_tag = soup.find('h1')
@@ -80,31 +44,42 @@ def scrape_page(url):
         print(f"❌ Erreur de scraping: {str(e)}")
         return None
 
+def extract_page(url, html):
+    """Parse le conteneur principal de la page puis en extrait le contenu"""
+    return scrape_page(url, parse_content(html, CONTENT_CONTAINERS, extra=('h1',)))
+
 def main():
+    parser = argparse.ArgumentParser(description="Scraping de la documentation WeWeb en JSON")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore le cache HTTP et retélécharge toutes les pages")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprend un scraping interrompu (file d'exploration sauvegardée et journal JSON Lines)")
+    add_crawl_arguments(parser, 'weweb_json')
+    args = parser.parse_args()
+    cache = None if args.no_cache else ResponseCache(cache_path('weweb_json'))
+    metrics = start_metrics('weweb_json', args)
+
     print("🚀 Démarrage du scraping WeWeb")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    print("\n🔍 Exploration des sites...")
-    dev_urls = get_all_urls(DEV_BASE_URL)
-    docs_urls = get_all_urls(DOCS_BASE_URL)
-
-    all_data = []
-    total = len(dev_urls) + len(docs_urls)
+    print("\n🔍 Exploration et extraction des sites...")
     start_time = time.time()
 
-    for idx, url in enumerate(dev_urls + docs_urls, 1):
-        print(f"\n📄 Traitement {idx}/{total}: {url}")
-        page_data = scrape_page(url)
-        if page_data:
-            all_data.append(page_data)
-            print(f"✅ {page_data['h1'][:50]}... traité")
-        time.sleep(REQUEST_DELAY)
-
-    # Sauvegarde du JSON
+    # Les pages sont écrites au fil de l'eau (JSON + journal .jsonl pour la reprise)
     output_path = os.path.join(OUTPUT_DIR, JSON_FILE)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    writer = StreamingJsonWriter(output_path, layout='array', resume=args.resume)
+    state = CrawlState(state_path('weweb_json'), resume=args.resume, on_checkpoint=writer.checkpoint)
+
+    def write_page(page_data):
+        writer.write(page_data)
+        print(f"✅ {page_data['h1'][:50]}... traité")
+
+    run_pipeline(DEV_BASE_URL, DOCS_BASE_URL, headers=HEADERS, delay=REQUEST_DELAY,
+                 extract=extract_page, write=write_page, max_concurrency=args.concurrency, cache=cache,
+                 skip=writer.done_urls, metrics=metrics, state=state)
+    writer.close()
 
+    metrics.print_summary(args.report)
     print(f"\n✅ Terminé en {time.time() - start_time:.2f} secondes")
     print(f"📂 Fichier JSON généré : {os.path.abspath(output_path)}")
 
@@ -0,0 +1,79 @@
+from urllib.parse import urljoin
+
+from bs4 import Tag
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5'}
+TEXT_TAGS = {'p', 'ul', 'ol'}
+
+
+def code_language(code):
+    """Langage déduit de la classe `language-xxx` d'un bloc <code>"""
+    for cls in code.get('class', []):
+        if cls.startswith('language-'):
+            return cls.replace('language-', '')
+    return 'unknown'
+
+
+def split_sections(root, page_url, dedupe_snippets=True):
+    """Découpe le contenu en sections en un seul parcours du document
+
+    Chaque titre h1-h5 ayant un `id` ouvre une section qui court jusqu'au titre
+    suivant, quel que soit son niveau d'imbrication dans le HTML ; le contenu
+    situé sous un titre sans `id` est ignoré. Retourne, dans l'ordre du document,
+    des dicts {'id', 'title', 'content' (liste de textes), 'code_snippets', 'images'}.
+    Images et extraits de code sont dédupliqués par ensemble haché, ce qui garde
+    un coût linéaire en taille de page.
+    """
+    sections = []
+    current = None
+    seen_images = set()
+    seen_snippets = set()
+
+    def walk(node, in_text):
+        nonlocal current, seen_images, seen_snippets
+        for child in node.children:
+            if not isinstance(child, Tag):
+                continue
+            name = child.name
+
+            if name in HEADING_TAGS:
+                current = None
+                if section_id := child.get('id'):
+                    current = {
+                        'id': section_id,
+                        'title': child.get_text().strip(),
+                        'content': [],
+                        'code_snippets': [],
+                        'images': []
+                    }
+                    sections.append(current)
+                    seen_images, seen_snippets = set(), set()
+                continue
+
+            if current is None:
+                walk(child, in_text)
+                continue
+
+            if name in TEXT_TAGS and not in_text:
+                current['content'].append(child.get_text(' ', strip=True))
+                walk(child, True)
+            elif name == 'img':
+                src = child.get('src') or child.get('data-src')
+                if src:
+                    if not src.startswith(('http://', 'https://')):
+                        src = urljoin(page_url, src)
+                    if src not in seen_images:
+                        seen_images.add(src)
+                        current['images'].append(src)
+            elif name == 'pre':
+                if code := child.find('code'):
+                    snippet = {'code': code.get_text().strip(), 'language': code_language(code)}
+                    key = (snippet['code'], snippet['language'])
+                    if not dedupe_snippets or key not in seen_snippets:
+                        seen_snippets.add(key)
+                        current['code_snippets'].append(snippet)
+            else:
+                walk(child, in_text)
+
+    walk(root, False)
+    return sections
@@ -0,0 +1,122 @@
+import gzip
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+from frontier import canonicalize_url
+
+MAX_SITEMAPS = 50  # Garde-fou contre les index de sitemaps qui se référencent en boucle
+
+
+def parse_robots(text, user_agent='*'):
+    """Extrait les sitemaps et le Crawl-delay applicable d'un robots.txt"""
+    sitemaps = []
+    crawl_delay = None
+    agents = []
+    in_rules = False
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+
+        if field == 'sitemap':
+            sitemaps.append(value)
+        elif field == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value)
+        else:
+            in_rules = True
+            if field == 'crawl-delay' and (user_agent in agents or '*' in agents):
+                try:
+                    crawl_delay = float(value)
+                except ValueError:
+                    pass
+
+    return {'sitemaps': sitemaps, 'crawl_delay': crawl_delay}
+
+
+def parse_lastmod(value):
+    """Convertit un <lastmod> (date ou date-heure W3C) en timestamp, ou None"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_sitemap(content):
+    """Retourne ('index' | 'urlset', [(loc, lastmod)]) pour un sitemap XML, gzippé ou non"""
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+    root = ET.fromstring(content)
+    kind = 'index' if root.tag.endswith('sitemapindex') else 'urlset'
+
+    entries = []
+    for node in root:
+        loc = lastmod = None
+        for child in node:
+            if child.tag.endswith('loc'):
+                loc = (child.text or '').strip()
+            elif child.tag.endswith('lastmod'):
+                lastmod = parse_lastmod(child.text)
+        if loc:
+            entries.append((loc, lastmod))
+    return kind, entries
+
+
+async def fetch_robots(client, base_url):
+    """Lit robots.txt (un robots.txt absent équivaut à aucune directive)"""
+    try:
+        response = await client.get(urljoin(base_url, '/robots.txt'))
+        if response.status_code == 200:
+            return parse_robots(response.text)
+    except Exception as e:
+        print(f"⚠️ robots.txt illisible pour {base_url}: {str(e)}")
+    return {'sitemaps': [], 'crawl_delay': None}
+
+
+async def discover_urls(client, base_url, robots=None):
+    """URLs du site annoncées par ses sitemaps, les plus récemment modifiées d'abord
+
+    Suit les index de sitemaps et les sitemaps gzippés, ne garde que les URLs
+    sous `base_url` (dédupliquées sur leur forme canonique) et retourne une
+    liste de (url, lastmod ou None).
+    """
+    robots = robots or await fetch_robots(client, base_url)
+    pending = list(robots['sitemaps']) or [urljoin(base_url + '/', 'sitemap.xml')]
+    fetched = set()
+    found = {}
+    base_url = canonicalize_url(base_url)
+
+    while pending and len(fetched) < MAX_SITEMAPS:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in fetched:
+            continue
+        fetched.add(sitemap_url)
+
+        try:
+            response = await client.get(sitemap_url)
+            response.raise_for_status()
+            kind, entries = parse_sitemap(response.content)
+        except Exception as e:
+            print(f"⚠️ Sitemap illisible {sitemap_url}: {str(e)}")
+            continue
+
+        if kind == 'index':
+            pending.extend(loc for loc, _ in entries)
+            continue
+        for loc, lastmod in entries:
+            key = canonicalize_url(loc)
+            if key.startswith(base_url):
+                previous = found.get(key, (loc, None))
+                found[key] = (previous[0], max(filter(None, (previous[1], lastmod)), default=None))
+
+    print(f"🗺️ {len(found)} URL(s) trouvée(s) dans les sitemaps de {base_url}")
+    return sorted(found.values(), key=lambda item: (-(item[1] or 0), item[0]))
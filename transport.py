@@ -0,0 +1,49 @@
+import httpx
+
+# HTTP/2 (multiplexage sur une seule connexion TLS par hôte) si le paquet h2 est installé
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# httpx annonce et décode brotli (Accept-Encoding: br) si le paquet brotli est installé, gzip sinon
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Configuration
+REQUEST_TIMEOUT = 15
+CONNECT_TIMEOUT = 10
+MAX_CONNECTIONS = 32  # Connexions ouvertes au total, tous hôtes confondus
+MAX_KEEPALIVE = 16  # Connexions inactives gardées ouvertes pour être réutilisées
+KEEPALIVE_EXPIRY = 30  # Secondes avant fermeture d'une connexion inactive
+
+
+def make_client(headers=None, max_connections=MAX_CONNECTIONS, max_keepalive=MAX_KEEPALIVE, http2=None,
+                timeout=REQUEST_TIMEOUT):
+    """Client HTTP asynchrone partagé par la découverte et l'extraction
+
+    Les connexions sont gardées ouvertes et réutilisées par hôte (un seul
+    handshake TLS par connexion) ; en HTTPS, HTTP/2 multiplexe les requêtes
+    simultanées sur une connexion quand le serveur le propose (ALPN), sinon
+    HTTP/1.1 keep-alive est utilisé. Les réponses compressées (brotli, gzip)
+    sont décodées par httpx.
+    """
+    return httpx.AsyncClient(
+        headers=headers,
+        http2=HTTP2_AVAILABLE if http2 is None else http2,
+        timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                            keepalive_expiry=KEEPALIVE_EXPIRY),
+        follow_redirects=True
+    )
+
+
+def describe():
+    """Résumé des capacités du transport, pour les messages de démarrage"""
+    protocols = "HTTP/2 + HTTP/1.1" if HTTP2_AVAILABLE else "HTTP/1.1 (installer h2 pour HTTP/2)"
+    encodings = "br, gzip, deflate" if BROTLI_AVAILABLE else "gzip, deflate (installer brotli pour br)"
+    return f"{protocols}, compression {encodings}"
@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from chunker import iter_chunks
+from dedup import Deduplicator
+
+# sentence-transformers est optionnel : sans lui, seul l'encodeur par hachage est disponible
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Configuration
+INDEX_DIR = "vector_index"
+DEFAULT_MODEL = "hashing"  # ou le nom d'un modèle sentence-transformers (ex. all-MiniLM-L6-v2)
+HASHING_DIM = 1024
+EMBED_BATCH = 256  # Textes encodés par appel au modèle
+KMEANS_SAMPLE = 20000  # Vecteurs utilisés pour entraîner les centroïdes
+KMEANS_ITERATIONS = 10
+NPROBE = 8  # Listes inversées explorées par requête
+TOP_K = 8
+SERVICE_PORT = 8000
+SERVICE_HOST = "127.0.0.1"  # Service sans authentification : local par défaut (0.0.0.0 pour n8n en conteneur)
+
+
+class HashingEmbedder:
+    """Encodeur local sans modèle : mots et bigrammes hachés dans un vecteur normalisé
+
+    Sert de solution de repli hors ligne ; la pondération logarithmique évite
+    que les longues sections n'écrasent les termes de la requête.
+    """
+
+    def __init__(self, dim=HASHING_DIM):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r'\w+', text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            hashes = np.array([zlib.crc32(feature.encode('utf-8')) for feature in features], dtype=np.uint32)
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dim, signs)
+            vectors[row] = np.sign(vectors[row]) * np.log1p(np.abs(vectors[row]))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Encodeur sentence-transformers exécuté localement (CPU ou GPU)"""
+
+    def __init__(self, model_name):
+        if SentenceTransformer is None:
+            raise RuntimeError("sentence-transformers n'est pas installé : pip install sentence-transformers")
+        self.name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        return self.model.encode(texts, batch_size=EMBED_BATCH, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def make_embedder(model=DEFAULT_MODEL):
+    if model == 'hashing' or model.startswith('hashing-'):
+        return HashingEmbedder(int(model.split('-')[1]) if '-' in model else HASHING_DIM)
+    return SentenceTransformerEmbedder(model)
+
+
+def kmeans(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """Centroïdes (normalisés) des listes inversées, par k-means sphérique"""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = sample[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def previous_vectors(path, model_name):
+    """Vecteurs d'un index existant réutilisables : {id du morceau: (hash, position)}"""
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return None, {}
+    index = VectorIndex(os.path.basename(path), os.path.dirname(path))
+    if index.meta['model'] != model_name:
+        index.close()
+        return None, {}
+    positions = np.empty_like(index.ids)
+    positions[index.ids] = np.arange(len(index.ids))
+    known = {chunk_id: (digest, int(positions[row_id]))
+             for row_id, chunk_id, digest in index.db.execute("SELECT id, chunk_id, hash FROM chunks")}
+    return index, known
+
+
+def build_index(name, inputs, model=DEFAULT_MODEL, index_dir=INDEX_DIR, dedup=True, near=False):
+    """Découpe (chunker.py), encode par lots et indexe (IVF) les pages des exports donnés
+
+    Les morceaux dont l'identifiant et l'empreinte existent déjà dans l'index
+    précédent reprennent leur vecteur : seuls les morceaux modifiés sont
+    ré-encodés. Les vecteurs sont écrits au fil de l'eau dans un fichier brut
+    puis rangés par liste inversée dans vectors.npy, relu ensuite en mémoire
+    mappée. Le texte des morceaux est stocké dans chunks.sqlite (clé : rang
+    d'arrivée du vecteur). L'index est construit à côté puis remplace l'ancien.
+
+    Avec `dedup`, un morceau identique (ou, avec `near`, quasi identique) à un
+    morceau déjà indexé n'est pas encodé : il est seulement référencé dans la
+    table `duplicates` et ses pages sont rendues dans `also_in`.
+    """
+    embedder = make_embedder(model)
+    path = os.path.join(index_dir, name)
+    build_path = f"{path}.building"
+    shutil.rmtree(build_path, ignore_errors=True)
+    os.makedirs(build_path)
+    raw_path = os.path.join(build_path, 'vectors.f32')
+    previous, known = previous_vectors(path, embedder.name)
+
+    db = sqlite3.connect(os.path.join(build_path, 'chunks.sqlite'))
+    db.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE, hash TEXT, url TEXT, "
+               "section TEXT, title TEXT, kind TEXT, text TEXT)")
+    db.execute("CREATE TABLE duplicates (chunk_id TEXT PRIMARY KEY, canonical TEXT, url TEXT, section TEXT)")
+    db.execute("CREATE INDEX duplicates_canonical ON duplicates (canonical)")
+    deduplicator = Deduplicator(near=near) if dedup else None
+    seen = set()  # Identifiants déjà traités : une page présente dans plusieurs exports n'est lue qu'une fois
+    count = embedded = repeated = 0
+    start_time = time.time()
+
+    with open(raw_path, 'wb') as raw:
+        batch = []
+
+        def flush():
+            nonlocal count, embedded
+            vectors = np.empty((len(batch), embedder.dim), dtype=np.float32)
+            fresh = []
+            for row, chunk in enumerate(batch):
+                digest, position = known.get(chunk['id'], (None, None))
+                if digest == chunk['hash']:
+                    vectors[row] = previous.vectors[position]
+                else:
+                    fresh.append(row)
+            if fresh:
+                vectors[fresh] = embedder.embed([f"{batch[row]['title']}\n{batch[row]['text']}" for row in fresh])
+            raw.write(vectors.tobytes())
+            db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           [(count + row, chunk['id'], chunk['hash'], chunk['url'], chunk['section'],
+                             chunk['title'], chunk['kind'], chunk['text']) for row, chunk in enumerate(batch)])
+            count += len(batch)
+            embedded += len(fresh)
+            batch.clear()
+
+        for chunk in iter_chunks(inputs):
+            if chunk['id'] in seen:
+                repeated += 1
+                continue
+            seen.add(chunk['id'])
+            canonical = deduplicator.check(chunk['id'], chunk['text'], chunk['kind']) if deduplicator else None
+            if canonical:
+                db.execute("INSERT OR REPLACE INTO duplicates VALUES (?, ?, ?, ?)",
+                           (chunk['id'], canonical, chunk['url'], chunk['section']))
+                continue
+            batch.append(chunk)
+            if len(batch) >= EMBED_BATCH:
+                flush()
+        if batch:
+            flush()
+
+    if previous:
+        previous.close()
+    if not count:
+        raise ValueError(f"Aucun texte à indexer dans {', '.join(inputs)}")
+    print(f"🧮 {count} morceaux, dont {embedded} encodés avec {embedder.name} "
+          f"en {time.time() - start_time:.2f} s ({count - embedded} repris de l'index précédent)")
+    if repeated:
+        print(f"♻️ {repeated} morceau(x) présent(s) dans plusieurs exports ignoré(s)")
+    if deduplicator:
+        print(f"🧬 {deduplicator.summary()}")
+
+    # Listes inversées : les vecteurs d'une même liste sont contigus sur disque
+    vectors = np.memmap(raw_path, dtype=np.float32, mode='r', shape=(count, embedder.dim))
+    nlist = max(1, min(int(np.sqrt(count)), count))
+    centroids = kmeans(vectors, nlist)
+    assignment = np.concatenate([np.argmax(vectors[i:i + EMBED_BATCH * 16] @ centroids.T, axis=1)
+                                 for i in range(0, count, EMBED_BATCH * 16)])
+    order = np.argsort(assignment, kind='stable')
+    offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+
+    ordered = np.lib.format.open_memmap(os.path.join(build_path, 'vectors.npy'), mode='w+',
+                                        dtype=np.float32, shape=(count, embedder.dim))
+    for i in range(0, count, EMBED_BATCH * 16):
+        ordered[i:i + EMBED_BATCH * 16] = vectors[order[i:i + EMBED_BATCH * 16]]
+    ordered.flush()
+    del ordered, vectors
+    os.remove(raw_path)
+
+    np.save(os.path.join(build_path, 'centroids.npy'), centroids)
+    np.save(os.path.join(build_path, 'offsets.npy'), offsets)
+    np.save(os.path.join(build_path, 'ids.npy'), order.astype(np.int64))
+    db.commit()
+    db.close()
+    with open(os.path.join(build_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'model': embedder.name, 'dim': embedder.dim, 'count': count, 'nlist': nlist}, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(build_path, path)
+    print(f"📦 Index {name} : {count} vecteurs, {nlist} listes → {os.path.abspath(path)}")
+
+
+class VectorIndex:
+    """Index IVF en lecture : vecteurs en mémoire mappée, recherche par produit scalaire"""
+
+    def __init__(self, name, index_dir=INDEX_DIR, embedder=None):
+        path = os.path.join(index_dir, name)
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.name = name
+        self.embedder = embedder or make_embedder(self.meta['model'])
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.ids = np.load(os.path.join(path, 'ids.npy'))
+        self.db = sqlite3.connect(os.path.join(path, 'chunks.sqlite'), check_same_thread=False)
+
+    def search(self, query, k=TOP_K, nprobe=NPROBE):
+        """Les `k` morceaux les plus proches de la requête : dicts score, url, section, title, text"""
+        vector = self.embedder.embed([query])[0]
+        lists = np.argsort(self.centroids @ vector)[::-1][:nprobe]
+
+        positions = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+        if not len(positions):
+            return []
+        scores = np.concatenate([self.vectors[self.offsets[i]:self.offsets[i + 1]] @ vector for i in lists])
+        best = np.argsort(scores)[::-1][:k]
+
+        results = []
+        for rank in best:
+            chunk_id = int(self.ids[positions[rank]])
+            chunk_uuid, url, section, title, kind, text = self.db.execute(
+                "SELECT chunk_id, url, section, title, kind, text FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            also_in = [url for url, in self.db.execute(
+                "SELECT DISTINCT url FROM duplicates WHERE canonical = ?", (chunk_uuid,))]
+            results.append({'score': float(scores[rank]), 'id': chunk_uuid, 'url': url, 'section': section,
+                            'title': title, 'kind': kind, 'text': text, 'also_in': also_in})
+        return results
+
+    def close(self):
+        self.db.close()
+        del self.vectors
+
+
+def positive_int(params, name, default):
+    """Paramètre entier strictement positif d'une requête ; ValueError sinon"""
+    value = int(params.get(name, default))
+    if value < 1:
+        raise ValueError(name)
+    return value
+
+
+def serve(index_dir=INDEX_DIR, port=SERVICE_PORT, host=SERVICE_HOST):
+    """Service HTTP de recherche : GET /search?index=weweb&q=...&k=8 → JSON
+
+    Remplace l'appel à Pinecone dans n8nflow.JSON (nœud HTTP Request ou
+    outil « HTTP Request Tool » de l'agent). Le service n'a pas
+    d'authentification : il n'écoute que sur `host`, 127.0.0.1 par défaut.
+    """
+    indexes = {name: VectorIndex(name, index_dir) for name in sorted(os.listdir(index_dir))
+               if os.path.exists(os.path.join(index_dir, name, 'meta.json'))}
+    print(f"🛰️ Index chargés : {', '.join(indexes) or 'aucun'}")
+
+    class SearchHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path != '/search' or 'q' not in params:
+                return self.reply(404, {'error': "utiliser /search?index=<nom>&q=<question>"})
+            index = indexes.get(params.get('index') or next(iter(indexes), ''))
+            if index is None:
+                return self.reply(404, {'error': f"index inconnu, disponibles : {list(indexes)}"})
+
+            try:
+                k = positive_int(params, 'k', TOP_K)
+                nprobe = positive_int(params, 'nprobe', NPROBE)
+            except ValueError:
+                return self.reply(400, {'error': "k et nprobe doivent être des entiers positifs"})
+
+            start_time = time.time()
+            results = index.search(params['q'], k=k, nprobe=nprobe)
+            self.reply(200, {'index': index.name, 'took_ms': round((time.time() - start_time) * 1000, 2),
+                             'results': results})
+
+        def reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), SearchHandler)
+    print(f"🔎 Service de recherche sur http://{host}:{port}/search")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index vectoriel local de la documentation scrapée")
+    parser.add_argument('--dir', default=INDEX_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Construit un index à partir d'exports")
+    build_parser.add_argument('name', help="Nom de l'index (ex. weweb, n8n)")
+    build_parser.add_argument('inputs', nargs='+')
+    build_parser.add_argument('--model', default=DEFAULT_MODEL,
+                              help="'hashing' ou nom d'un modèle sentence-transformers")
+    build_parser.add_argument('--no-dedup', action='store_true', help="Encode aussi les morceaux dupliqués")
+    build_parser.add_argument('--near', action='store_true', help="Regroupe aussi les quasi-doublons (MinHash)")
+
+    query_parser = commands.add_parser('query', help="Interroge un index")
+    query_parser.add_argument('name')
+    query_parser.add_argument('query')
+    query_parser.add_argument('-k', type=int, default=TOP_K)
+    query_parser.add_argument('--nprobe', type=int, default=NPROBE)
+
+    serve_parser = commands.add_parser('serve', help="Lance le service HTTP de recherche")
+    serve_parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    serve_parser.add_argument('--host', default=SERVICE_HOST,
+                              help="Adresse d'écoute (0.0.0.0 : accessible depuis le réseau, sans authentification)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.name, args.inputs, model=args.model, index_dir=args.dir,
+                    dedup=not args.no_dedup, near=args.near)
+    elif args.command == 'query':
+        index = VectorIndex(args.name, args.dir)
+        start_time = time.time()
+        results = index.search(args.query, k=args.k, nprobe=args.nprobe)
+        for result in results:
+            print(f"\n📄 {result['title']}  ({result['score']:.3f})")
+            print(f"   {result['url']}#{result['section']}")
+            print(f"   {result['text'][:200]}")
+        print(f"\n🔎 {len(results)} résultat(s) en {(time.time() - start_time) * 1000:.1f} ms")
+    else:
+        serve(args.dir, args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()